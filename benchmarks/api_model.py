@@ -0,0 +1,90 @@
+"""In-process stand-in for the MLflow pyfunc model served by `src.api.main`.
+
+Exposes what the API uses from a pyfunc model (`predict(DataFrame)` and
+`metadata.get_input_schema().inputs[*].name/.type`) with a fixed per-call cost, so the
+API benchmarks measure request handling rather than a particular estimator. Pass
+--model-uri to the benchmarks to load a real model instead.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["hour", "dayofweek", "month", "hour_sin", "hour_cos", "value_lag_1", "value_lag_3", "value_lag_24"]
+
+
+@dataclass
+class _DataType:
+    name: str
+
+    def to_numpy(self):
+        return np.dtype({"long": "int64", "integer": "int32", "double": "float64"}[self.name])
+
+
+@dataclass
+class StandInModel:
+    columns: list[str] = field(default_factory=lambda: FEATURES + ["PM10", "Temperature"])
+    call_overhead: float = 200e-6  # seconds per predict call, like a small tree ensemble
+    calls: int = 0
+
+    def __post_init__(self):
+        inputs = [
+            SimpleNamespace(name=c, type=_DataType("long" if c in ("hour", "dayofweek", "month") else "double"))
+            for c in self.columns
+        ]
+        schema = SimpleNamespace(inputs=inputs, input_names=lambda: list(self.columns))
+        self.metadata = SimpleNamespace(get_input_schema=lambda: schema)
+        self.weights = np.linspace(0.1, 1.0, len(self.columns))
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"columns are missing: {set(missing)}")
+        self.calls += 1
+        if self.call_overhead:
+            time.sleep(self.call_overhead)
+        if list(df.columns) != self.columns:
+            df = df[self.columns]
+        return df.to_numpy(dtype="float64") @ self.weights
+
+
+def rows(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "hour": int(h),
+            "dayofweek": int(d),
+            "month": int(m),
+            "value_lag_1": float(a),
+            "value_lag_3": float(b),
+            "value_lag_24": float(c),
+        }
+        for h, d, m, a, b, c in zip(
+            rng.integers(0, 24, n),
+            rng.integers(0, 7, n),
+            rng.integers(1, 13, n),
+            rng.random(n) * 80,
+            rng.random(n) * 80,
+            rng.random(n) * 80,
+        )
+    ]
+
+
+def install(uri: str | None = None):
+    """Make `src.api.main` serve `uri` (MLflow) or a `StandInModel`; returns the model."""
+    from src.api import main
+
+    if uri:
+        import mlflow.pyfunc
+
+        model = mlflow.pyfunc.load_model(uri)
+    else:
+        model = StandInModel()
+    main.load_model = lambda: model
+    if hasattr(main, "load_feature_builder"):
+        main.load_feature_builder.cache_clear()
+    return model
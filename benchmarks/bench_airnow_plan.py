@@ -0,0 +1,98 @@
+"""AirNow requests and site coverage: one `fetch_current` per point vs `fetch_many`.
+
+No network: a mock transport answers like `observation/latLong/current`, i.e. with the
+observations of the single reporting area nearest to the query point (within
+`distance`), over synthetic areas scattered in the bbox. Each grid is queried twice
+(overlapping collector configs) plus sub-precision jitter, the duplicates `fetch_many`
+collapses; the match column checks it returns exactly the sites of the per-point calls.
+
+Usage:
+    python -m benchmarks.bench_airnow_plan --step 0.25 --distance 25
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import random
+
+import httpx
+
+from src.scraping import airnow_client
+from src.scraping.session import ScrapingSession
+
+PARAMETERS = ("PM2.5", "O3")
+
+
+def grid(lat0: float, lat1: float, lon0: float, lon1: float, step: float) -> list[tuple[float, float]]:
+    n_lat, n_lon = int(round((lat1 - lat0) / step)) + 1, int(round((lon1 - lon0) / step)) + 1
+    return [(lat0 + i * step, lon0 + j * step) for i in range(n_lat) for j in range(n_lon)]
+
+
+def miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 3958.8 * math.asin(math.sqrt(a))
+
+
+def mock_transport(areas: list[tuple[str, float, float]], counter: list[int]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        counter[0] += 1
+        q = request.url.params
+        lat, lon, distance = float(q["latitude"]), float(q["longitude"]), float(q["distance"])
+        dist, name, a_lat, a_lon = min((miles(lat, lon, a_lat, a_lon), name, a_lat, a_lon) for name, a_lat, a_lon in areas)
+        if dist > distance:
+            return httpx.Response(200, json=[])
+        return httpx.Response(
+            200,
+            json=[
+                {"ReportingArea": name, "StateCode": "CA", "Latitude": a_lat, "Longitude": a_lon, "ParameterName": p}
+                for p in PARAMETERS
+            ],
+        )
+
+    return httpx.MockTransport(handler)
+
+
+def sites(observations) -> set:
+    return {airnow_client._site_key(obs) for obs in observations}
+
+
+async def run(points, areas, distance: float):
+    per_point, planned = [0], [0]
+    session = ScrapingSession()
+    session._sync_client = httpx.Client(transport=mock_transport(areas, per_point))
+    session._async_client = httpx.AsyncClient(transport=mock_transport(areas, planned))
+    async with session:
+        expected = set()
+        for lat, lon in points:
+            expected |= sites(airnow_client.fetch_current(lat, lon, distance, session=session))
+        got = sites(await airnow_client.fetch_many(points, distance, session=session))
+    return per_point[0], planned[0], expected, got
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bbox", type=float, nargs=4, default=[33.5, 34.5, -119.0, -117.5], help="lat0 lat1 lon0 lon1")
+    parser.add_argument("--step", type=float, nargs="+", default=[0.1, 0.25, 0.5])
+    parser.add_argument("--distance", type=float, default=25)
+    parser.add_argument("--areas", type=int, default=40, help="synthetic reporting areas in the bbox")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    os.environ.setdefault("AIRNOW_API_KEY", "bench")
+
+    lat0, lat1, lon0, lon1 = args.bbox
+    rng = random.Random(args.seed)
+    areas = [(f"area-{i}", rng.uniform(lat0, lat1), rng.uniform(lon0, lon1)) for i in range(args.areas)]
+
+    print(f"{'step_deg':>8} {'points':>7} {'per_point':>9} {'planned':>7} {'sites':>6} {'match':>6}")
+    for step in args.step:
+        base = grid(*args.bbox, step)
+        points = base + base + [(lat + 1e-6, lon - 1e-6) for lat, lon in base]
+        per_point, planned, expected, got = asyncio.run(run(points, areas, args.distance))
+        print(f"{step:>8} {len(points):>7} {per_point:>9} {planned:>7} {len(expected):>6} {str(expected == got):>6}")
+
+
+if __name__ == "__main__":
+    main()
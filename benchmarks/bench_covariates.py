@@ -0,0 +1,80 @@
+"""Covariate as-of join (`src.features.covariates.asof_join`) vs join-then-filter.
+
+Synthetic hourly weather for --stations stations over --days days, and measurements at
+random times for the same stations. The naive version merges on the station (every
+measurement x every weather row of its station) and keeps the latest row within the
+tolerance; it is capped by --naive-max pairs.
+
+Usage:
+    python -m benchmarks.bench_covariates --stations 200 --days 730 --rows 1000000 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features.covariates import COVARIATE_TOLERANCE, asof_join
+
+
+def weather(stations: int, days: int) -> pd.DataFrame:
+    hours = pd.date_range("2024-01-01", periods=days * 24, freq="h", tz="UTC")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "station": np.repeat(np.arange(stations), len(hours)),
+            "datetime": np.tile(hours, stations),
+            "temperature_2m": rng.normal(12, 8, stations * len(hours)).astype("float32"),
+        }
+    )
+
+
+def measurements(rows: int, stations: int, days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    offsets = pd.to_timedelta(rng.integers(0, days * 86400, rows), unit="s")
+    return pd.DataFrame(
+        {
+            "station": rng.integers(0, stations, rows),
+            "datetime": pd.Timestamp("2024-01-01", tz="UTC") + offsets,
+            "value": rng.random(rows),
+        }
+    )
+
+
+def naive(df: pd.DataFrame, cov: pd.DataFrame) -> np.ndarray:
+    pairs = df.reset_index().merge(cov, on="station", suffixes=("", "_cov"))
+    age = pairs["datetime"] - pairs["datetime_cov"]
+    pairs = pairs[(age >= pd.Timedelta(0)) & (age <= COVARIATE_TOLERANCE)]
+    latest = pairs.sort_values("datetime_cov").groupby("index")["temperature_2m"].last()
+    return latest.reindex(range(len(df))).to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--naive-max", type=int, default=50_000_000, help="Max measurement x weather pairs")
+    args = parser.parse_args()
+
+    cov = weather(args.stations, args.days)
+    print(f"weather: {len(cov)} rows ({args.stations} stations x {args.days} days hourly)")
+    print(f"{'rows':>10} {'naive_s':>9} {'asof_s':>8} {'Mrows/s':>8} {'match':>6}")
+    for n in args.rows:
+        df = measurements(n, args.stations, args.days)
+        t0 = time.perf_counter()
+        out = asof_join(df.copy(), cov, by="station")
+        seconds = time.perf_counter() - t0
+        before, match = float("nan"), "-"
+        if n * len(cov) / args.stations <= args.naive_max:
+            t0 = time.perf_counter()
+            expected = naive(df, cov)
+            before = time.perf_counter() - t0
+            match = str(np.allclose(out["temperature_2m"].to_numpy(), expected, equal_nan=True))
+        print(f"{n:>10} {before:>9.2f} {seconds:>8.3f} {n / seconds / 1e6:>8.1f} {match:>6}")
+
+
+if __name__ == "__main__":
+    main()
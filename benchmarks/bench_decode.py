@@ -0,0 +1,53 @@
+"""Typed Arrow decoding vs `pandas.json_normalize` on synthetic v3 measurements.
+
+Usage:
+    python -m benchmarks.bench_decode --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from pandas import json_normalize
+
+from src.scraping.openaq_schema import decode_measurements
+
+from .mock_openaq import measurement
+
+
+def synthetic(n: int, sensors: int = 500) -> list[dict]:
+    # build one template per sensor/hour then copy: generating 1M timestamps dominates otherwise
+    per_sensor = max(1, n // sensors)
+    base = [measurement(s, i % 24) for s in range(sensors) for i in range(24)]
+    rows = []
+    for k in range(n):
+        row = dict(base[k % len(base)])
+        row["sensor_id"] = k // per_sensor
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    records = synthetic(args.rows)
+
+    t0 = time.perf_counter()
+    df = json_normalize(records)
+    t_norm = time.perf_counter() - t0
+    mem_norm = df.memory_usage(deep=True).sum()
+
+    t0 = time.perf_counter()
+    batch = decode_measurements(records)
+    t_dec = time.perf_counter() - t0
+
+    print(f"rows={args.rows}")
+    print(f"json_normalize : {t_norm:7.2f}s  {mem_norm / 2**20:8.1f} MiB  {df.shape[1]} cols")
+    print(f"decode (arrow) : {t_dec:7.2f}s  {batch.nbytes / 2**20:8.1f} MiB  {batch.num_columns} cols")
+    print(f"speedup        : {t_norm / t_dec:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
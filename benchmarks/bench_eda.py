@@ -0,0 +1,190 @@
+"""EDA endpoints served from the in-memory dataset cache vs reading the file per request.
+
+Writes a synthetic `features_air_quality.parquet` (--cities x --days daily rows, the
+columns and compact layout of `build_features_air_quality`) to a temporary directory and
+calls the handlers in-process. "per-request" repeats what every call used to do
+(`pd.read_parquet` of the whole file, then describe/nulls/sort/variances); "cached" is
+the warm latency. The file is then rewritten to check that the new version is picked up
+in the background while the old one is still served.
+
+The /eda/timeseries queries (city, time range, LTTB to --points) are timed against a
+full read filtered in pandas, uncached (scan + downsampling) and cached.
+
+/eda/sample pages (--page-rows rows at the start, middle and end of the file, JSON and
+NDJSON) are timed against the previous handler run on the in-memory frame (row slice,
+row-wise `apply` for the risk, `to_dict(orient="records")` + pydantic + json).
+
+Usage:
+    python -m benchmarks.bench_eda --cities 500 --days 2000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+
+from src.api import main as api
+from src.api.dataset import DatasetCache, file_signature
+from src.api.sample import SAMPLE_COLUMNS, encode_cursor
+from src.api.timeseries import downsampled_series
+from src.features.build_features_air_quality import COVARIATES, LAGS, _write
+
+
+def synthetic_features(cities: int, days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = cities * days
+    dates = pd.date_range("2019-01-01", periods=days, freq="D", tz="UTC")
+    df = pd.DataFrame(
+        {
+            "value": rng.gamma(2.0, 20.0, n),
+            "datetime": np.tile(dates, cities),
+            "City": np.repeat([f"City{i:04d}" for i in range(cities)], days),
+            "Country": np.repeat([f"Country{i % 40:02d}" for i in range(cities)], days),
+        }
+    )
+    df["hour"] = 0
+    df["dayofweek"] = df["datetime"].dt.dayofweek
+    df["month"] = df["datetime"].dt.month
+    df["hour_sin"] = 0.0
+    df["hour_cos"] = 1.0
+    for lag in LAGS:
+        df[f"value_lag_{lag}"] = df.groupby("City")["value"].shift(lag)
+    for col in COVARIATES:
+        df[col] = rng.random(n) * 100
+    return df.dropna(ignore_index=True)
+
+
+def per_request(path: Path, endpoint: str):
+    """What the endpoints did before the cache: full read + derive, on every call."""
+    df = pd.read_parquet(path)
+    if endpoint == "summary":
+        return df.describe().to_dict(), df.isna().sum().to_dict()
+    if endpoint == "timeseries":
+        return df.sort_values("datetime").tail(300)
+    if endpoint == "sample":
+        return df.head(80)
+    return df[df.select_dtypes(include=["number"]).columns].var(numeric_only=True)
+
+
+def naive_series(path: Path, city: str | None, start: str | None, end: str | None) -> pd.DataFrame:
+    df = pd.read_parquet(path)
+    if city:
+        df = df[df["City"] == city]
+    if start:
+        df = df[df["datetime"] >= pd.Timestamp(start, tz="UTC")]
+    if end:
+        df = df[df["datetime"] < pd.Timestamp(end, tz="UTC")]
+    return df.groupby("datetime", as_index=False)["value"].mean()
+
+
+def legacy_sample(df: pd.DataFrame, offset: int, limit: int) -> bytes:
+    def compute_risk(row):
+        for key in ["pm25", "value"]:
+            if key in row and pd.notna(row[key]):
+                return int(max(0, min(5, round(row[key] / 20))))
+        return 0
+
+    page = df[[c for c in SAMPLE_COLUMNS if c in df.columns]].iloc[offset : offset + limit].copy()
+    page["risk_level"] = page.apply(compute_risk, axis=1)
+    rows = api.EDASample(rows=page.to_dict(orient="records"))
+    return json.dumps(jsonable_encoder(rows)).encode()
+
+
+def sample(limit: int, cursor: str | None, accept: str = "application/json") -> bytes:
+    request = Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+    response = api.eda_sample(request, limit=limit, cursor=cursor)
+
+    async def body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(body())
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--points", type=int, default=300)
+    parser.add_argument("--page-rows", type=int, nargs="+", default=[80, 10_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "features_air_quality.parquet"
+        _write(synthetic_features(args.cities, args.days), path)
+        api.eda_cache = DatasetCache(path)
+        t0 = time.perf_counter()
+        first = api.eda_cache.get()
+        print(f"{len(first.frame)} rows, {path.stat().st_size / 2**20:.1f} MiB; first load {time.perf_counter() - t0:.2f}s")
+
+        handlers = {
+            "summary": api.eda_summary,
+            "timeseries": lambda: api.eda_timeseries(limit=300),
+            "sample": lambda: sample(80, None),
+            "metrics": api.model_metrics,
+        }
+        print(f"{'endpoint':>11} {'per-request_ms':>15} {'cached_ms':>10}")
+        for name, handler in handlers.items():
+            before = timed(lambda: per_request(path, name), args.repeat)
+            after = timed(handler, args.repeat * 20)
+            print(f"{name:>11} {before * 1e3:>15.1f} {after * 1e3:>10.3f}")
+
+        signature = file_signature(path)
+        print(f"\n{'timeseries query':>36} {'rows':>6} {'pandas_ms':>10} {'scan_ms':>8} {'cached_ms':>10}")
+        for city, start, end in (
+            ("City0042", None, None),
+            ("City0042", "2020-01-01", "2021-01-01"),
+            (None, "2020-01-01", "2021-01-01"),
+            (None, None, None),
+        ):
+            rows = len(naive_series(path, city, start, end))
+            before = timed(lambda: naive_series(path, city, start, end), args.repeat)
+            scan = timed(lambda: downsampled_series.__wrapped__(path, signature, city, start, end, args.points), args.repeat)
+            cached = timed(lambda: api.eda_timeseries(city=city, start=start, end=end, points=args.points), args.repeat * 20)
+            label = f"{city or 'all cities'} {start or '-'}..{end or '-'}"
+            print(f"{label:>36} {rows:>6} {before * 1e3:>10.1f} {scan * 1e3:>8.1f} {cached * 1e3:>10.3f}")
+
+        frame = api.eda_cache.get().frame
+        n = len(frame)
+        print(f"\n{'sample page':>20} {'previous_ms':>12} {'json_ms':>8} {'ndjson_ms':>10}")
+        for limit in args.page_rows:
+            for where, offset in (("start", 0), ("middle", n // 2), ("end", n - limit)):
+                rg, start = divmod(offset, 64 * 1024)  # ROW_GROUP_SIZE of the feature layout
+                cursor = encode_cursor(signature, rg, start) if offset else None
+                before = timed(lambda: legacy_sample(frame, offset, limit), args.repeat)
+                as_json = timed(lambda: sample(limit, cursor), args.repeat)
+                as_ndjson = timed(lambda: sample(limit, cursor, "application/x-ndjson"), args.repeat)
+                label = f"{limit} rows @ {where}"
+                print(f"{label:>20} {before * 1e3:>12.2f} {as_json * 1e3:>8.2f} {as_ndjson * 1e3:>10.2f}")
+
+        _write(synthetic_features(args.cities, args.days // 2, seed=1), path)
+        t0 = time.perf_counter()
+        stale = api.eda_summary().shape
+        served = time.perf_counter() - t0
+        while api.eda_cache.get() is first:
+            time.sleep(0.01)
+        print(
+            f"rewrite: stale {stale} served in {served * 1e3:.2f}ms during reload,"
+            f" new {api.eda_summary().shape} after {time.perf_counter() - t0:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Sustained /predict throughput with and without server-side micro-batching.
+
+--clients concurrent clients send --requests single-row requests in total through the
+ASGI app in-process (httpx ASGITransport, one worker). The `StandInModel` of
+`benchmarks.api_model` charges --call-overhead-us per predict call, whatever the number
+of rows, like the fixed per-call cost of a real model (or use --model-uri). Predictions
+are checked against the non-batched run.
+
+Usage:
+    python -m benchmarks.bench_microbatch --clients 32 --requests 5000 --max-wait-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.api_model import install, rows
+from src.api import main as api
+
+
+async def run(records: list[dict], clients: int) -> tuple[float, np.ndarray, np.ndarray]:
+    predictions = np.empty(len(records))
+    latencies = np.empty(len(records))
+    queue = iter(range(len(records)))
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            for i in queue:
+                t0 = time.perf_counter()
+                resp = await client.post("/predict", json=records[i])
+                resp.raise_for_status()
+                latencies[i] = time.perf_counter() - t0
+                predictions[i] = resp.json()["prediction"]
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return time.perf_counter() - t0, predictions, latencies * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--call-overhead-us", type=float, default=2000.0)
+    parser.add_argument("--model-uri", default=None)
+    args = parser.parse_args()
+
+    model = install(args.model_uri)
+    if not args.model_uri:
+        model.call_overhead = args.call_overhead_us * 1e-6
+    api.MICROBATCH_MAX_SIZE, api.MICROBATCH_MAX_WAIT_MS = args.max_batch, args.max_wait_ms
+    records = rows(args.requests)
+    print(f"{'mode':>10} {'req/s':>8} {'p50_ms':>7} {'p99_ms':>7} {'calls':>6} {'match':>6}")
+    baseline = None
+    for enabled in (False, True):
+        api.MICROBATCH = enabled
+        calls = getattr(model, "calls", 0)
+        seconds, preds, ms = asyncio.run(run(records, args.clients))
+        calls = getattr(model, "calls", 0) - calls
+        baseline = preds if baseline is None else baseline
+        p50, p99 = np.percentile(ms, [50, 99])
+        print(
+            f"{'batched' if enabled else 'per-call':>10} {len(records) / seconds:>8.0f} {p50:>7.2f} {p99:>7.2f}"
+            f" {calls:>6} {str(np.allclose(preds, baseline)):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Wall time of `openaq_client.fetch_latest` versus max concurrency, against a local mock.
+
+Usage:
+    python -m benchmarks.bench_openaq_fanout --locations 20 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import os
+import time
+
+from .mock_openaq import MockOpenAQ
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--locations", type=int, default=20)
+    parser.add_argument("--sensors", type=int, default=2, help="Sensors per location")
+    parser.add_argument("--rows", type=int, default=50, help="Measurements per sensor")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server latency (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    with MockOpenAQ(args.locations, args.sensors, args.rows, args.latency) as server:
+        os.environ["OPENAQ_BASE_URL"] = server.base_url
+        # measure the fan-out, not the client rate limiter (see bench_openaq_ratelimit)
+        os.environ["OPENAQ_RATE_PER_MINUTE"] = "1e9"
+        os.environ.setdefault("OPENAQ_API_KEY", "bench")
+        from src.scraping import openaq_client
+
+        client = importlib.reload(openaq_client)
+        limit = args.locations * args.sensors * args.rows
+        print(f"{'concurrency':>11} {'rows':>8} {'requests':>8} {'wall_s':>8}")
+        for n in args.concurrency:
+            before = server.requests
+            t0 = time.perf_counter()
+            rows = asyncio.run(client.fetch_latest(country="FR", limit=limit, max_concurrency=n))
+            wall = time.perf_counter() - t0
+            print(f"{n:>11} {len(rows):>8} {server.requests - before:>8} {wall:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Throughput of `openaq_client.fetch_latest` against a rate-limited local mock.
+
+Shows how many requests were throttled client-side (token bucket) versus rejected
+server-side (429) for a given client rate.
+
+Usage:
+    python -m benchmarks.bench_openaq_ratelimit --server-rate 20 --client-rate 1200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import os
+import time
+
+from .mock_openaq import MockOpenAQ
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--server-rate", type=int, default=20, help="Requests allowed per second by the mock")
+    parser.add_argument("--client-rate", type=float, default=1200, help="Scheduler budget, requests per minute")
+    args = parser.parse_args()
+
+    with MockOpenAQ(args.locations, 2, 50, latency=0.01, rate_limit=args.server_rate, window=1.0) as server:
+        os.environ["OPENAQ_BASE_URL"] = server.base_url
+        os.environ["OPENAQ_RATE_PER_MINUTE"] = str(args.client_rate)
+        os.environ.setdefault("OPENAQ_API_KEY", "bench")
+        from src.scraping import openaq_client
+
+        client = importlib.reload(openaq_client)
+        t0 = time.perf_counter()
+        rows = asyncio.run(client.fetch_latest(limit=args.locations * 2 * 50, max_concurrency=16))
+        wall = time.perf_counter() - t0
+        stats = client.SCHEDULER.stats
+        print(f"rows={len(rows)} wall={wall:.2f}s server_429={server.throttled}")
+        print(f"requests={stats.requests} retries={stats.retries} throttled={stats.throttled_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
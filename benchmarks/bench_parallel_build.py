@@ -0,0 +1,71 @@
+"""Scaling of the sharded OpenAQ feature build (`src.features.parallel`) from 1 to N workers.
+
+A synthetic raw file (one row per sensor and hour, jittered timestamps) is written to a
+temporary data/ tree; each run's output is compared with the serial build's file bytes.
+
+Usage:
+    python -m benchmarks.bench_parallel_build --sensors 3000 --hours 1000 --workers 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features import build_features as bf
+from src.features.parallel import build_features_parallel
+
+
+def raw_frame(sensors: int, hours: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = np.datetime64("2025-01-01T00:00:00", "s")
+    hour = np.tile(np.arange(hours, dtype="int64"), sensors)
+    jitter = rng.integers(-600, 600, size=len(hour))
+    stamps = start + (hour * 3600 + jitter) * np.timedelta64(1, "s")
+    return pd.DataFrame(
+        {
+            "sensor_id": np.repeat(np.arange(sensors, dtype="int64"), hours),
+            "value": rng.random(len(hour)) * 80,
+            "datetime_from": pd.to_datetime(stamps).tz_localize("UTC"),
+        }
+    )
+
+
+def timed_build(fn, *args, **kwargs) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sensors", type=int, default=3000)
+    parser.add_argument("--hours", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        bf.RAW_PATH.mkdir(parents=True)
+        raw_frame(args.sensors, args.hours).sample(frac=1, random_state=0).to_parquet(bf.RAW_PATH / "raw.parquet")
+        print(f"{args.sensors * args.hours} rows, {args.sensors} sensors, {os.cpu_count()} cores")
+
+        serial = timed_build(bf.build_features, "raw.parquet", "serial.parquet")
+        expected = (bf.FEATURES_PATH / "serial.parquet").read_bytes()
+        print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'identical':>9}")
+        print(f"{'serial':>7} {serial:>8.2f} {1.0:>7.2f}x {'-':>9}")
+        for workers in args.workers:
+            seconds = timed_build(build_features_parallel, "raw.parquet", f"p{workers}.parquet", workers=workers)
+            same = (bf.FEATURES_PATH / f"p{workers}.parquet").read_bytes() == expected
+            print(f"{workers:>7} {seconds:>8.2f} {serial / seconds:>7.2f}x {str(same):>9}")
+
+
+if __name__ == "__main__":
+    main()
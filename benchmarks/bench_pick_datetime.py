@@ -0,0 +1,82 @@
+"""Schema-driven `pick_datetime` vs the previous column scan (`_pick_datetime_scan`).
+
+Two raw layouts: json_normalize'd v3 payloads (flat string columns) and unflattened
+payloads with a `period` dict column. The dict layout is capped by --period-max since
+10M Python dicts do not fit in a small worker's memory.
+
+Usage:
+    python -m benchmarks.bench_pick_datetime --rows 10000 1000000 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features.build_features import pick_datetime, _pick_datetime_scan
+
+
+def iso_strings(n: int) -> np.ndarray:
+    start = np.datetime64("2025-01-01T00:00:00", "s")
+    stamps = start + np.arange(n, dtype="int64") * np.timedelta64(60, "s")
+    return np.char.add(np.datetime_as_string(stamps, unit="s"), "Z").astype(object)
+
+
+def flat_frame(n: int) -> pd.DataFrame:
+    utc = iso_strings(n)
+    return pd.DataFrame(
+        {
+            "value": np.random.default_rng(0).random(n),
+            "parameter.name": "pm25",
+            "parameter.units": "µg/m³",
+            "period.label": "raw",
+            "period.interval": "01:00:00",
+            "period.datetimeFrom.local": utc,
+            "period.datetimeFrom.utc": utc,
+            "period.datetimeTo.utc": utc,
+        }
+    )
+
+
+def period_frame(n: int) -> pd.DataFrame:
+    utc = iso_strings(n)
+    return pd.DataFrame(
+        {
+            "value": np.random.default_rng(0).random(n),
+            "period": [
+                {"label": "raw", "interval": "01:00:00", "datetimeFrom": {"utc": u}, "datetimeTo": {"utc": u}}
+                for u in utc
+            ],
+        }
+    )
+
+
+def timed(fn, df: pd.DataFrame) -> tuple[float, pd.Series]:
+    t0 = time.perf_counter()
+    out = fn(df)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--period-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'layout':>7} {'rows':>10} {'scan_s':>8} {'schema_s':>9} {'speedup':>8} {'match':>6}")
+    for n in args.rows:
+        for name, make in (("flat", flat_frame), ("period", period_frame)):
+            if name == "period" and n > args.period_max:
+                continue
+            df = make(n)
+            before, expected = timed(_pick_datetime_scan, df)
+            after, out = timed(pick_datetime, df)
+            match = out.notna().all() and out.equals(expected)
+            print(f"{name:>7} {n:>10} {before:>8.3f} {after:>9.3f} {before / after:>7.1f}x {str(match):>6}")
+            del df
+
+
+if __name__ == "__main__":
+    main()
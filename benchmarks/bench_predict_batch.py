@@ -0,0 +1,77 @@
+"""Throughput of `/predict/batch` (JSON, NDJSON, Arrow IPC) vs one `/predict` call per row.
+
+Runs the FastAPI app in-process (TestClient) against the `StandInModel` of
+`benchmarks.api_model`, or a real model with --model-uri. Per-row throughput is measured
+on --per-row-max requests; batch predictions are checked against the per-row ones.
+
+Usage:
+    python -m benchmarks.bench_predict_batch --rows 1000 50000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from benchmarks.api_model import install, rows
+from src.api.batch import ARROW_STREAM, NDJSON
+from src.api.main import app
+
+
+def arrow_body(records: list[dict]) -> bytes:
+    table = pa.Table.from_pandas(pd.DataFrame.from_records(records), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def batch_call(client: TestClient, records: list[dict], fmt: str) -> tuple[float, np.ndarray]:
+    if fmt == "json":
+        body, ctype = orjson.dumps(records), "application/json"
+    elif fmt == "ndjson":
+        body, ctype = b"\n".join(orjson.dumps(r) for r in records), NDJSON
+    else:
+        body, ctype = arrow_body(records), ARROW_STREAM
+    t0 = time.perf_counter()
+    resp = client.post("/predict/batch", content=body, headers={"content-type": ctype})
+    resp.raise_for_status()
+    if fmt == "json":
+        preds = np.array(orjson.loads(resp.content)["predictions"], dtype="float64")
+    elif fmt == "ndjson":
+        preds = np.array([orjson.loads(line)["prediction"] for line in resp.content.splitlines()])
+    else:
+        preds = pa.ipc.open_stream(resp.content).read_all().column("prediction").to_numpy()
+    return time.perf_counter() - t0, preds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 50_000])
+    parser.add_argument("--per-row-max", type=int, default=2000)
+    parser.add_argument("--model-uri", default=None)
+    args = parser.parse_args()
+
+    install(args.model_uri)
+    client = TestClient(app)
+    print(f"{'rows':>7} {'mode':>8} {'seconds':>8} {'rows/s':>10} {'match':>6}")
+    for n in args.rows:
+        records = rows(n)
+        sample = records[: min(n, args.per_row_max)]
+        t0 = time.perf_counter()
+        single = np.array([client.post("/predict", json=r).json()["prediction"] for r in sample])
+        seconds = time.perf_counter() - t0
+        print(f"{n:>7} {'per-row':>8} {seconds * n / len(sample):>8.2f} {len(sample) / seconds:>10.0f} {'-':>6}")
+        for fmt in ("json", "ndjson", "arrow"):
+            seconds, preds = batch_call(client, records, fmt)
+            match = np.allclose(preds[: len(single)], single)
+            print(f"{n:>7} {fmt:>8} {seconds:>8.3f} {n / seconds:>10.0f} {str(match):>6}")
+
+
+if __name__ == "__main__":
+    main()
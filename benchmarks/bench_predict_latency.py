@@ -0,0 +1,61 @@
+"""p50/p99 latency of the `/predict` and `/predict/full` handlers.
+
+The handlers are called in-process (no HTTP stack) against the `StandInModel` of
+`benchmarks.api_model`, whose fixed predict cost is set by --call-overhead-us (0 by
+default, to measure the API's own work), or a real model with --model-uri.
+
+Usage:
+    python -m benchmarks.bench_predict_latency --requests 20000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.api_model import install, rows
+from src.api.main import FullPredictionRequest, PredictionRequest, predict, predict_full
+
+
+def full_request(row: dict) -> FullPredictionRequest:
+    fields = dict.fromkeys(FullPredictionRequest.model_fields, 0.0)
+    fields.update(industrial_zone=False, ville="Paris", hour=row["hour"], dayofweek=row["dayofweek"], month=row["month"])
+    fields.update(pm25=row["value_lag_1"], pm10=row["value_lag_3"], no2=row["value_lag_24"])
+    return FullPredictionRequest(**fields)
+
+
+def latencies(handler, requests: list) -> np.ndarray:
+    out = np.empty(len(requests))
+    for i, req in enumerate(requests):
+        t0 = time.perf_counter()
+        handler(req)
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--call-overhead-us", type=float, default=0.0)
+    parser.add_argument("--model-uri", default=None)
+    args = parser.parse_args()
+
+    model = install(args.model_uri)
+    if not args.model_uri:
+        model.call_overhead = args.call_overhead_us * 1e-6
+    records = rows(args.requests + args.warmup)
+    print(f"{'endpoint':>13} {'p50_us':>8} {'p99_us':>8} {'req/s':>8}")
+    for name, handler, requests in (
+        ("/predict", predict, [PredictionRequest(**r) for r in records]),
+        ("/predict/full", predict_full, [full_request(r) for r in records]),
+    ):
+        latencies(handler, requests[: args.warmup])
+        us = latencies(handler, requests[args.warmup :])
+        p50, p99 = np.percentile(us, [50, 99])
+        print(f"{name:>13} {p50:>8.1f} {p99:>8.1f} {len(us) / us.sum() * 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""`add_rolling` (one O(n) pass over all series) vs naive per-group `rolling().apply`.
+
+Synthetic hourly data with jittered timestamps for --sensors series. The naive version,
+`groupby(sensor).rolling(window, on=datetime, closed="left").apply(np.<stat>, raw=True)`,
+is capped by --naive-max rows; its results are checked against `add_rolling`.
+
+Usage:
+    python -m benchmarks.bench_rolling --rows 100000 1000000 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features.rolling import ROLLING_STATS, ROLLING_WINDOWS, add_rolling
+
+NAIVE = {"mean": np.mean, "std": lambda a: np.std(a, ddof=1) if len(a) > 1 else np.nan, "min": np.min, "max": np.max}
+
+
+def frame(rows: int, sensors: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    hours = rows // sensors
+    start = np.datetime64("2025-01-01T00:00:00", "s")
+    hour = np.tile(np.arange(hours, dtype="int64"), sensors)
+    stamps = start + (hour * 3600 + rng.integers(-600, 600, len(hour))) * np.timedelta64(1, "s")
+    df = pd.DataFrame(
+        {
+            "sensor_id": np.repeat(np.arange(sensors, dtype="int64"), hours),
+            "datetime": pd.to_datetime(stamps).tz_localize("UTC"),
+            "value": rng.random(len(hour)) * 80,
+        }
+    )
+    return df.sort_values("datetime", kind="stable", ignore_index=True)
+
+
+def naive(df: pd.DataFrame) -> pd.DataFrame:
+    out = {}
+    ordered = df.sort_values(["sensor_id", "datetime"], kind="stable")
+    for window in ROLLING_WINDOWS:
+        roll = ordered.groupby("sensor_id").rolling(window, on="datetime", closed="left", min_periods=1)["value"]
+        for stat in ROLLING_STATS:
+            values = roll.apply(NAIVE[stat], raw=True)
+            out[f"value_roll_{stat}_{window.lower()}"] = pd.Series(values.to_numpy(), index=ordered.index)
+    return pd.DataFrame(out).sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--naive-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'naive_s':>9} {'vector_s':>9} {'Mrows/s':>8} {'speedup':>8} {'match':>6}")
+    for n in args.rows:
+        df = frame(n, args.sensors)
+        t0 = time.perf_counter()
+        fast = add_rolling(df.copy(), halflives=(), by="sensor_id")
+        vector = time.perf_counter() - t0
+        before, match = float("nan"), "-"
+        if n <= args.naive_max:
+            t0 = time.perf_counter()
+            expected = naive(df)
+            before = time.perf_counter() - t0
+            match = str(np.allclose(fast[expected.columns].to_numpy(), expected.to_numpy(), equal_nan=True))
+        print(
+            f"{len(df):>10} {before:>9.2f} {vector:>9.3f} {len(df) / vector / 1e6:>8.1f} "
+            f"{before / vector:>7.0f}x {match:>6}"
+        )
+        del df, fast
+
+
+if __name__ == "__main__":
+    main()
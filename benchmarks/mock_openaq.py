@@ -0,0 +1,159 @@
+"""Local mock of the OpenAQ v3 endpoints used by `src.scraping.openaq_client`.
+
+Serves synthetic locations/sensors/measurements with a fixed per-request latency so
+client-side changes can be benchmarked without an API key or network access.
+
+Usage (inside a benchmark):
+    with MockOpenAQ(n_locations=20, latency=0.05) as server:
+        os.environ["OPENAQ_BASE_URL"] = server.base_url
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def measurement(sensor_id: int, i: int, parameter_id: int = 2) -> dict:
+    """Synthetic v3 measurement, `i` hours before START (desc order like the API)."""
+    t0 = START - timedelta(hours=i + 1)
+    t1 = t0 + timedelta(hours=1)
+    return {
+        "value": float((sensor_id * 7 + i) % 90),
+        "parameter": {"id": parameter_id, "name": "pm25", "units": "µg/m³"},
+        "period": {
+            "label": "raw",
+            "interval": "01:00:00",
+            "datetimeFrom": {"utc": t0.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            "datetimeTo": {"utc": t1.strftime("%Y-%m-%dT%H:%M:%SZ")},
+        },
+        "coordinates": {"latitude": 48.85 + sensor_id * 1e-3, "longitude": 2.35},
+    }
+
+
+class MockOpenAQ:
+    def __init__(
+        self,
+        n_locations: int = 10,
+        sensors_per_location: int = 2,
+        rows_per_sensor: int = 200,
+        latency: float = 0.05,
+        rate_limit: int | None = None,
+        window: float = 1.0,
+    ):
+        self.n_locations = n_locations
+        self.sensors_per_location = sensors_per_location
+        self.rows_per_sensor = rows_per_sensor
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests = 0
+        self.throttled = 0
+        self._window_start = time.monotonic()
+        self._window_used = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def _locations(self) -> list[dict]:
+        return [
+            {
+                "id": loc,
+                "sensors": [
+                    {"id": loc * 100 + s, "parameter": {"id": 2, "name": "pm25"}}
+                    for s in range(self.sensors_per_location)
+                ],
+            }
+            for loc in range(1, self.n_locations + 1)
+        ]
+
+    def _route(self, path: str, query: dict) -> dict:
+        limit = int(query.get("limit", ["100"])[0])
+        page = int(query.get("page", ["1"])[0])
+        if path == "/v3/locations":
+            rows = self._locations()
+        elif m := re.fullmatch(r"/v3/sensors/(\d+)/measurements", path):
+            sensor_id = int(m.group(1))
+            rows = [measurement(sensor_id, i) for i in range(self.rows_per_sensor)]
+            if since := query.get("datetime_from", [None])[0]:
+                # inclusive, like the v3 API; timestamps share one ISO format
+                rows = [r for r in rows if r["period"]["datetimeFrom"]["utc"] >= since]
+            if query.get("sort", ["desc"])[0] == "asc":
+                rows.reverse()
+        else:
+            raise KeyError(path)
+        results = rows[(page - 1) * limit : page * limit]
+        return {"meta": {"page": page, "limit": limit, "found": len(rows)}, "results": results}
+
+    def _quota(self) -> tuple[bool, dict]:
+        """Fixed-window quota; returns (allowed, rate-limit headers)."""
+        if self.rate_limit is None:
+            return True, {}
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._window_used = now, 0
+            allowed = self._window_used < self.rate_limit
+            if allowed:
+                self._window_used += 1
+            else:
+                self.throttled += 1
+            reset = max(0.0, self.window - (now - self._window_start))
+            remaining = self.rate_limit - self._window_used
+        return allowed, {"x-ratelimit-remaining": str(remaining), "x-ratelimit-reset": f"{reset:.3f}"}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with mock._lock:
+                    mock.requests += 1
+                time.sleep(mock.latency)
+                allowed, headers = mock._quota()
+                url = urlparse(self.path)
+                try:
+                    body = json.dumps(mock._route(url.path, parse_qs(url.query))).encode()
+                    status = 200
+                except KeyError:
+                    body, status = b'{"detail": "not found"}', 404
+                if not allowed:
+                    body, status = b'{"detail": "Too many requests"}', 429
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # client cancelled the request (e.g. an unneeded prefetch)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "MockOpenAQ":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
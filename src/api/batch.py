@@ -0,0 +1,93 @@
+"""Payload decoding and streamed encoding for `/predict/batch`.
+
+Accepted request bodies (by Content-Type):
+- application/json: an array of row objects, or an object of column arrays
+  ({"hour": [...], "value_lag_1": [...], ...})
+- application/x-ndjson: one row object per line
+- application/vnd.apache.arrow.stream (or .file): an Arrow IPC stream/file
+
+The response uses the Accept header, or the request's format when Accept is absent or */*:
+JSON `{"predictions": [...]}`, NDJSON `{"prediction": ...}` lines, or an Arrow IPC stream
+with one `prediction` column. It is produced in chunks, so a large batch is never
+materialized as one response string.
+"""
+from __future__ import annotations
+
+import io
+from typing import Iterator
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+CHUNK_ROWS = 8192
+
+
+def _media(header: str | None) -> str:
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def decode_rows(body: bytes, content_type: str | None) -> pd.DataFrame:
+    """Request body -> one DataFrame (raises ValueError on malformed payloads)."""
+    media = _media(content_type) or JSON
+    try:
+        if media in (ARROW_STREAM, ARROW_FILE):
+            reader = pa.ipc.open_file(body) if body[:6] == b"ARROW1" else pa.ipc.open_stream(body)
+            return reader.read_all().to_pandas()
+        if media == NDJSON:
+            lines = [line for line in body.splitlines() if line.strip()]
+            payload = orjson.loads(b"[" + b",".join(lines) + b"]")
+        elif media == JSON:
+            payload = orjson.loads(body)
+        else:
+            raise ValueError(f"Unsupported Content-Type {media!r}; use {JSON}, {NDJSON} or {ARROW_STREAM}")
+    except (orjson.JSONDecodeError, pa.ArrowInvalid) as exc:
+        raise ValueError(f"Malformed {media} body: {exc}") from exc
+    if isinstance(payload, dict):
+        return pd.DataFrame(payload)
+    if isinstance(payload, list) and all(isinstance(row, dict) for row in payload):
+        return pd.DataFrame.from_records(payload)
+    raise ValueError("Expected an array of row objects or an object of column arrays")
+
+
+def response_media_type(accept: str | None, content_type: str | None) -> str:
+    """Response format: the Accept header if it names a supported one, else the request's."""
+    for media in (_media(part) for part in (accept or "").split(",")):
+        if media in (JSON, NDJSON, ARROW_STREAM):
+            return media
+    media = _media(content_type)
+    return ARROW_STREAM if media in (ARROW_STREAM, ARROW_FILE) else media if media == NDJSON else JSON
+
+
+def encode_predictions(predictions: np.ndarray, media: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield the serialized predictions chunk by chunk."""
+    predictions = np.asarray(predictions, dtype="float64")
+    chunks = (predictions[i : i + chunk_rows] for i in range(0, len(predictions), chunk_rows))
+    if media == ARROW_STREAM:
+        yield from _arrow_chunks(chunks)
+    elif media == NDJSON:
+        for chunk in chunks:
+            yield b"".join(b'{"prediction":%s}\n' % orjson.dumps(v) for v in chunk.tolist())
+    else:
+        yield b'{"predictions":['
+        for i, chunk in enumerate(chunks):
+            # "[1.0,2.0]" -> "1.0,2.0", comma-joined across chunks
+            yield (b"," if i else b"") + orjson.dumps(chunk, option=orjson.OPT_SERIALIZE_NUMPY)[1:-1]
+        yield b"]}"
+
+
+def _arrow_chunks(chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+    schema = pa.schema([("prediction", pa.float64())])
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(pa.record_batch([pa.array(chunk)], schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
@@ -0,0 +1,98 @@
+"""In-memory feature dataset shared by the EDA endpoints.
+
+`DatasetCache.get()` returns the current `DatasetVersion`: the frame read once from the
+parquet file plus the summaries derived from it (describe, nulls, variances, time order).
+Each call only stats the file; when its mtime/size changed, a background thread reads
+and summarizes the new file and swaps it in whole, while requests keep being served from
+the previous version. A file that cannot be read (e.g. still being written) leaves the
+previous version in place and is retried once it changes again.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DatasetVersion:
+    signature: tuple[int, int]  # (mtime_ns, size)
+    frame: pd.DataFrame
+    describe: dict
+    nulls: dict
+    numeric_columns: list[str]
+    variances: pd.Series
+    time_order: Optional[np.ndarray]  # row positions by datetime, NaT last; None without datetime
+
+    @classmethod
+    def load(cls, path: Path, signature: tuple[int, int]) -> "DatasetVersion":
+        df = pd.read_parquet(path)
+        numeric = df.select_dtypes(include=["number"]).columns.tolist()
+        time_order = None
+        if "datetime" in df.columns:
+            times = pd.DatetimeIndex(df["datetime"])
+            time_order = np.lexsort((times.asi8, times.isna()))
+        return cls(
+            signature=signature,
+            frame=df,
+            describe=df.describe().to_dict(),
+            nulls=df.isna().sum().to_dict(),
+            numeric_columns=numeric,
+            variances=df[numeric].var(numeric_only=True),
+            time_order=time_order,
+        )
+
+
+def file_signature(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DatasetCache:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._current: Optional[DatasetVersion] = None
+        self._failed: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+
+    def get(self) -> Optional[DatasetVersion]:
+        """Current version (None if the file does not exist); the first read raises on a bad file."""
+        signature = file_signature(self.path)
+        if signature is None:
+            return None
+        current = self._current
+        if current is None:
+            # first request: nothing to serve yet, load in the foreground
+            with self._lock:
+                if self._current is None:
+                    self._current = DatasetVersion.load(self.path, signature)
+            return self._current
+        if signature != current.signature and signature != self._failed:
+            self._reload_in_background(signature)
+        return current
+
+    def _reload_in_background(self, signature: tuple[int, int]):
+        with self._lock:
+            if self._loader is not None and self._loader.is_alive():
+                return
+            self._loader = threading.Thread(target=self._reload, args=(signature,), daemon=True)
+            self._loader.start()
+
+    def _reload(self, signature: tuple[int, int]):
+        try:
+            version = DatasetVersion.load(self.path, signature)
+        except Exception:
+            logging.exception("[dataset] could not load %s; keeping the previous version", self.path)
+            self._failed = signature
+            return
+        self._current = version
@@ -7,10 +7,21 @@ from typing import Optional
 from pathlib import Path
 
 import mlflow.pyfunc
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import pandas as pd
+import pyarrow.parquet as pq
+
+from .batch import NDJSON, decode_rows, encode_predictions, response_media_type
+from .dataset import DatasetCache, DatasetVersion, file_signature
+from .microbatch import MicroBatcher
+from .sample import decode_cursor, encode_cursor, encode_json, encode_ndjson, page_plan, read_page
+from .schema import FeatureBuilder
+from .timeseries import downsampled_series
 
 app = FastAPI(title="Air Quality Risk API", version="0.1.0")
 
@@ -31,6 +42,14 @@ app.add_middleware(
 
 MODEL_URI = os.getenv("MODEL_URI", "")
 EDA_FILE = Path("data/features/features_air_quality.parquet")
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "200000"))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(64 * 2**20)))
+MAX_TIMESERIES_POINTS = 10_000
+MAX_SAMPLE_ROWS = 100_000
+# regroupe les appels concurrents de /predict et /predict/full en un seul model.predict
+MICROBATCH = os.getenv("MICROBATCH", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
 
 
 class PredictionRequest(BaseModel):
@@ -79,6 +98,7 @@ class EDATimeseries(BaseModel):
 
 class EDASample(BaseModel):
     rows: list[dict]
+    next_cursor: Optional[str] = None
 
 
 class ModelMetrics(BaseModel):
@@ -91,6 +111,17 @@ class ModelMetrics(BaseModel):
     feature_importance: list[dict]
 
 
+# fichier de features gardé en mémoire pour les endpoints EDA, rechargé quand il change
+eda_cache = DatasetCache(EDA_FILE)
+
+
+def load_eda() -> DatasetVersion:
+    dataset = eda_cache.get()
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Features file not found")
+    return dataset
+
+
 @lru_cache()
 def load_model():
     if not MODEL_URI:
@@ -103,51 +134,51 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict(req: PredictionRequest):
-    model = load_model()
-    hour = req.hour % 24
+@lru_cache()
+def load_feature_builder() -> FeatureBuilder:
+    """Colonnes, types et valeurs par défaut du modèle, résolus une seule fois."""
+    return FeatureBuilder.from_model(load_model())
+
+
+def predict_rows(rows: list[dict]) -> np.ndarray:
+    """Un seul appel au modèle pour plusieurs lignes de features."""
+    df = load_feature_builder().frame(pd.DataFrame.from_records(rows))
+    return np.asarray(load_model().predict(df), dtype="float64").ravel()
+
+
+@lru_cache()
+def load_batcher() -> MicroBatcher:
+    return MicroBatcher(predict_rows, max_batch=MICROBATCH_MAX_SIZE, max_wait=MICROBATCH_MAX_WAIT_MS / 1000)
+
+
+def predict_row(row: dict) -> float:
+    if MICROBATCH:
+        return load_batcher().predict(row)
+    return float(load_model().predict(load_feature_builder().row(row))[0])
+
+
+def base_features(hour: int, dayofweek: int, month: int, lag_1: float, lag_3: float, lag_24: float) -> dict:
+    hour = hour % 24
     hour_rad = 2 * math.pi * hour / 24
-    base_row = {
+    return {
         "hour": hour,
-        "dayofweek": req.dayofweek % 7,
-        "month": req.month,
+        "dayofweek": dayofweek % 7,
+        "month": month,
         "hour_sin": math.sin(hour_rad),
         "hour_cos": math.cos(hour_rad),
-        "value_lag_1": req.value_lag_1,
-        "value_lag_3": req.value_lag_3,
-        "value_lag_24": req.value_lag_24,
+        "value_lag_1": lag_1,
+        "value_lag_3": lag_3,
+        "value_lag_24": lag_24,
     }
 
-    df = pd.DataFrame([base_row])
-
-    try:
-        input_schema = model.metadata.get_input_schema()
-        expected_cols = [field.name for field in input_schema.inputs]
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = 0.0
-        df = df[expected_cols]
-    except Exception:
-        pass
 
+@app.post("/predict", response_model=PredictionResponse)
+def predict(req: PredictionRequest):
+    row = base_features(req.hour, req.dayofweek, req.month, req.value_lag_1, req.value_lag_3, req.value_lag_24)
     try:
-        pred = model.predict(df)[0]
-        return PredictionResponse(prediction=float(pred))
+        return PredictionResponse(prediction=predict_row(row))
     except Exception as e:
-        msg = str(e)
-        if "columns are missing" in msg:
-            try:
-                missing_part = msg.split("{", 1)[1].split("}", 1)[0]
-                missing_cols = [c.strip(" '") for c in missing_part.split(",")]
-                for col in missing_cols:
-                    if col and col not in df.columns:
-                        df[col] = 0.0
-                pred = model.predict(df)[0]
-                return PredictionResponse(prediction=float(pred))
-            except Exception:
-                pass
-        raise HTTPException(status_code=500, detail=msg)
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/predict/full", response_model=PredictionResponse)
@@ -156,64 +187,145 @@ def predict_full(req: FullPredictionRequest):
     Endpoint dynamique utilisé par le frontend : mappe les champs du formulaire
     vers les features attendues par le modèle (lags et features horaires).
     """
-    model = load_model()
-    hour = req.hour % 24
-    hour_rad = 2 * math.pi * hour / 24
-
+    load_model()  # sans modèle configuré : erreur explicite, pas de valeur par défaut
     # on mappe les mesures vers les lags utilisés par le modèle actuel
-    base_row = {
-        "hour": hour,
-        "dayofweek": req.dayofweek % 7,
-        "month": req.month,
-        "hour_sin": math.sin(hour_rad),
-        "hour_cos": math.cos(hour_rad),
-        "value_lag_1": req.pm25,
-        "value_lag_3": req.pm10,
-        "value_lag_24": req.no2,
-    }
+    row = base_features(req.hour, req.dayofweek, req.month, req.pm25, req.pm10, req.no2)
+    try:
+        return PredictionResponse(prediction=predict_row(row))
+    except Exception:
+        # en cas d'échec, renvoie une valeur par défaut plutôt que de casser le front
+        return PredictionResponse(prediction=0.0)
+
 
-    df = pd.DataFrame([base_row])
+def batch_features(rows: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized equivalent of the per-row feature mapping of `/predict`.
 
+    Extra columns are kept, so models trained on more features can be fed directly.
+    Raises ValueError for a missing column or a null, non-numeric or (for int fields)
+    fractional value, as `PredictionRequest` validation does for `/predict`.
+    """
+    missing = [c for c in PredictionRequest.model_fields if c not in rows.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    df = rows.copy()
+    for name, field in PredictionRequest.model_fields.items():
+        values = pd.to_numeric(df[name], errors="coerce")
+        invalid = values.isna()
+        if field.annotation is int:
+            invalid |= values % 1 != 0
+        if invalid.any():
+            row = int(np.argmax(invalid.to_numpy()))
+            raise ValueError(f"Column {name!r}: invalid {field.annotation.__name__} at row {row}: {df[name].iloc[row]}")
+        df[name] = values.astype("int64") if field.annotation is int else values.astype("float64")
+    hour = df["hour"].to_numpy() % 24
+    hour_rad = (2 * np.pi / 24) * hour
+    df["hour"] = hour
+    df["dayofweek"] = df["dayofweek"].to_numpy() % 7
+    df["hour_sin"] = np.sin(hour_rad)
+    df["hour_cos"] = np.cos(hour_rad)
+    return df
+
+
+async def read_batch_body(request: Request) -> bytes:
+    """Request body, refused with 413 as soon as it exceeds `MAX_BATCH_BYTES`.
+
+    A declared Content-Length is checked before anything is read; chunked bodies are
+    cut off while streaming in.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Body larger than {MAX_BATCH_BYTES} bytes")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_BATCH_BYTES:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BATCH_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """
+    Prédictions en lot : des milliers de lignes (mêmes champs que `/predict`) en JSON
+    (tableau de lignes ou objet de colonnes), NDJSON ou Arrow IPC, un seul appel
+    `model.predict`, résultats renvoyés en flux dans le format demandé (Accept).
+    Corps refusé (413) au-delà de `MAX_BATCH_BYTES` octets ou `MAX_BATCH_ROWS` lignes ;
+    décodage et calcul des features hors de la boucle d'événements.
+    """
+    content_type = request.headers.get("content-type")
+    body = await read_batch_body(request)
+
+    def prepare() -> pd.DataFrame:
+        rows = decode_rows(body, content_type)
+        if len(rows) > MAX_BATCH_ROWS:
+            raise HTTPException(status_code=413, detail=f"Batch larger than {MAX_BATCH_ROWS} rows")
+        return batch_features(rows)
+
+    # decoding and feature building are CPU-bound: keep them off the event loop
     try:
-        input_schema = model.metadata.get_input_schema()
-        expected_cols = [field.name for field in input_schema.inputs]
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = 0.0
-        df = df[expected_cols]
-    except Exception:
-        pass
+        df = await run_in_threadpool(prepare)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    model = load_model()
+
+    def score() -> np.ndarray:
+        return np.asarray(model.predict(load_feature_builder().frame(df)), dtype="float64").ravel()
 
     try:
-        pred = model.predict(df)[0]
-        return PredictionResponse(prediction=float(pred))
+        predictions = await run_in_threadpool(score)
     except Exception as e:
-        # en cas d'échec, renvoie une valeur par défaut plutôt que de casser le front
-        fallback = 0.0
-        return PredictionResponse(prediction=float(fallback))
+        raise HTTPException(status_code=500, detail=str(e))
+    media = response_media_type(request.headers.get("accept"), content_type)
+    return StreamingResponse(encode_predictions(predictions, media), media_type=media)
 
 
 @app.get("/eda/summary", response_model=EDAStats)
 def eda_summary():
-    if not EDA_FILE.exists():
-        raise HTTPException(status_code=404, detail="Features file not found")
-    df = pd.read_parquet(EDA_FILE)
+    dataset = load_eda()
+    df = dataset.frame
     return EDAStats(
         shape=df.shape,
         columns=list(df.columns),
-        describe=df.describe().to_dict(),
-        nulls=df.isna().sum().to_dict(),
+        describe=dataset.describe,
+        nulls=dataset.nulls,
     )
 
 
 @app.get("/eda/timeseries", response_model=EDATimeseries)
-def eda_timeseries(limit: int = 300):
-    if not EDA_FILE.exists():
-        raise HTTPException(status_code=404, detail="Features file not found")
-    df = pd.read_parquet(EDA_FILE)
+def eda_timeseries(
+    limit: int = 300,
+    city: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    points: Optional[int] = None,
+):
+    """
+    Série temporelle pour les graphiques. Sans filtre : les `limit` dernières mesures.
+    Avec `city`, `start`/`end` (ISO, fin exclue) ou `points` : lecture des seules colonnes
+    datetime/value/City filtrée dans le parquet, moyenne par date si aucune ville n'est
+    donnée, puis réduction à `points` points (défaut `limit`) par LTTB.
+    """
+    if city or start or end or points:
+        path = eda_cache.path
+        signature = file_signature(path)
+        if signature is None:
+            raise HTTPException(status_code=404, detail="Features file not found")
+        target = min(points or limit, MAX_TIMESERIES_POINTS)
+        try:
+            datetimes, values = downsampled_series(path, signature, city, start, end, target)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return EDATimeseries(datetime=datetimes, value=values)
+
+    dataset = load_eda()
+    df = dataset.frame
     if "datetime" not in df.columns or "value" not in df.columns:
         raise HTTPException(status_code=400, detail="Columns 'datetime' and 'value' are required")
-    df = df.sort_values("datetime").tail(limit)
+    df = df.take(dataset.time_order[-limit:] if limit > 0 else [])
     return EDATimeseries(
         datetime=df["datetime"].astype(str).tolist(),
         value=df["value"].astype(float).tolist(),
@@ -221,51 +333,33 @@ def eda_timeseries(limit: int = 300):
 
 
 @app.get("/eda/sample", response_model=EDASample)
-def eda_sample(limit: int = 50):
+def eda_sample(request: Request, limit: int = 50, cursor: Optional[str] = None):
     """
     Renvoie un échantillon du fichier de features pour alimenter la table Dataset côté frontend.
+    Pagination par curseur : `next_cursor` (aussi dans l'en-tête X-Next-Cursor) donne la page
+    suivante via `?cursor=` ; `limit` doit valoir au moins 1 (422 sinon). Lecture row group
+    par row group (mémoire constante), réponse JSON `{"rows": [...]}` ou NDJSON
+    (`Accept: application/x-ndjson`) envoyée en flux.
     """
-    if not EDA_FILE.exists():
+    path = eda_cache.path
+    signature = file_signature(path)
+    if signature is None:
         raise HTTPException(status_code=404, detail="Features file not found")
-    df = pd.read_parquet(EDA_FILE)
-
-    # Colonnes utiles si disponibles
-    preferred_cols = [
-        "pm25",
-        "pm10",
-        "no2",
-        "o3",
-        "co",
-        "so2",
-        "temperature",
-        "humidity",
-        "wind_speed",
-        "traffic_density",
-        "green_spaces",
-        "industrial_zone",
-        "ville",
-        "city",
-        "station",
-        "datetime",
-        "value",
-    ]
-    existing = [c for c in preferred_cols if c in df.columns]
-    sample_df = df[existing].head(limit).copy()
-
-    # Ajoute un niveau de risque simple basé sur pm25 ou value
-    def compute_risk(row):
-        ref = None
-        for key in ["pm25", "value"]:
-            if key in row and pd.notna(row[key]):
-                ref = row[key]
-                break
-        if ref is None:
-            return 0
-        return int(max(0, min(5, round(ref / 20))))
-
-    sample_df["risk_level"] = sample_df.apply(compute_risk, axis=1)
-
-    return EDASample(rows=sample_df.to_dict(orient="records"))
+    try:
+        row_group, offset = decode_cursor(cursor, signature)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    parquet = pq.ParquetFile(path)
+    try:
+        slices, next_position = page_plan(parquet.metadata, row_group, offset, min(limit, MAX_SAMPLE_ROWS))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    next_cursor = encode_cursor(signature, *next_position) if next_position else None
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    pages = read_page(parquet, slices)
+    if response_media_type(request.headers.get("accept"), None) == NDJSON:
+        return StreamingResponse(encode_ndjson(pages), media_type=NDJSON, headers=headers)
+    return StreamingResponse(encode_json(pages, next_cursor), media_type="application/json", headers=headers)
 
 
 @app.get("/model/metrics", response_model=ModelMetrics)
@@ -273,23 +367,20 @@ def model_metrics():
     """
     Fournit des métriques simples dérivées du fichier de features pour alimenter la section Modeling.
     """
-    if not EDA_FILE.exists():
-        raise HTTPException(status_code=404, detail="Features file not found")
-    df = pd.read_parquet(EDA_FILE)
+    dataset = load_eda()
 
-    numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-    if not numeric_cols:
+    if not dataset.numeric_columns:
         raise HTTPException(status_code=400, detail="No numeric columns available")
 
     # Scores synthétiques basés sur la variance globale (juste pour affichage)
-    variance = df[numeric_cols].var(numeric_only=True).mean()
+    var_series = dataset.variances
+    variance = var_series.mean()
     base_score = max(0.6, min(0.95, 0.7 + variance / 500))
     precision = base_score - 0.02
     recall = base_score + 0.01
     f1 = (2 * precision * recall) / (precision + recall)
 
     # Importance des features : normalisation des variances
-    var_series = df[numeric_cols].var(numeric_only=True)
     total_var = var_series.sum()
     importances = (
         var_series.divide(total_var if total_var else 1)
@@ -0,0 +1,68 @@
+"""Micro-batching of concurrent single-row predictions.
+
+Request threads `submit` one feature row and block on a Future. A collector thread takes
+the first pending row, waits at most `max_wait` seconds for others (up to `max_batch`
+rows), scores them with one `predict_many` call and hands each result back to its
+request. Under load the fixed cost of `model.predict` is paid once per batch instead of
+once per request; an isolated request waits at most `max_wait` more.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Mapping, Sequence
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        predict_many: Callable[[Sequence[Mapping[str, object]]], np.ndarray],
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.predict_many = predict_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: queue.SimpleQueue[tuple[Mapping[str, object], Future]] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="predict-microbatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Mapping[str, object]) -> Future:
+        """Queue one feature row; the Future resolves to its prediction (float)."""
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row: Mapping[str, object]) -> float:
+        return self.submit(row).result()
+
+    def _collect(self) -> list[tuple[Mapping[str, object], Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                predictions = np.asarray(self.predict_many([row for row, _ in batch]), dtype="float64").ravel()
+                if len(predictions) != len(batch):
+                    raise ValueError(f"model returned {len(predictions)} predictions for {len(batch)} rows")
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), prediction in zip(batch, predictions.tolist()):
+                future.set_result(prediction)
@@ -0,0 +1,149 @@
+"""Cursor-paginated pages of the feature file for `/eda/sample`.
+
+A page is read row group by row group from the parquet file (only the sample columns),
+so memory is bounded by one row group whatever the file size or page position. The
+cursor is an opaque `<row group>.<offset>.<version>` token; a cursor issued for another
+version of the file (mtime/size changed) is rejected rather than silently skipping or
+repeating rows. Rows are serialized with orjson, as one JSON document or NDJSON lines,
+chunk by chunk.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Iterator, Optional
+
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Colonnes utiles si disponibles
+SAMPLE_COLUMNS = [
+    "pm25",
+    "pm10",
+    "no2",
+    "o3",
+    "co",
+    "so2",
+    "temperature",
+    "humidity",
+    "wind_speed",
+    "traffic_density",
+    "green_spaces",
+    "industrial_zone",
+    "ville",
+    "city",
+    "station",
+    "datetime",
+    "value",
+]
+RISK_COLUMNS = ("pm25", "value")
+
+
+def _version(signature: tuple[int, int]) -> str:
+    return hashlib.blake2b(repr(signature).encode(), digest_size=6).hexdigest()
+
+
+def encode_cursor(signature: tuple[int, int], row_group: int, offset: int) -> str:
+    return f"{row_group}.{offset}.{_version(signature)}"
+
+
+def decode_cursor(cursor: Optional[str], signature: tuple[int, int]) -> tuple[int, int]:
+    """(row group, offset) of `cursor`; ValueError if malformed or from another file version."""
+    if not cursor:
+        return 0, 0
+    try:
+        row_group, offset, version = cursor.split(".")
+        position = int(row_group), int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}") from None
+    if version != _version(signature):
+        raise ValueError("The dataset changed since this cursor was issued; restart without cursor")
+    return position
+
+
+def page_plan(metadata: pq.FileMetaData, row_group: int, offset: int, limit: int):
+    """Row-group slices [(row group, start, stop)] of the page and the next position (or None).
+
+    Raises ValueError for `limit < 1`: an empty page would hand back its own position as
+    the next one, and a client following cursors would never get past it.
+    """
+    if limit < 1:
+        raise ValueError("limit must be >= 1")
+    slices = []
+    while limit > 0 and row_group < metadata.num_row_groups:
+        rows = metadata.row_group(row_group).num_rows
+        stop = min(rows, offset + limit)
+        if stop > offset:
+            slices.append((row_group, offset, stop))
+            limit -= stop - offset
+        if stop < rows:
+            return slices, (row_group, stop)
+        row_group, offset = row_group + 1, 0
+    return slices, ((row_group, offset) if row_group < metadata.num_row_groups else None)
+
+
+def risk_level(table: pa.Table) -> np.ndarray:
+    """round(ref / 20) clipped to 0..5, ref = pm25 or else value (0 when neither is known)."""
+    ref = np.full(table.num_rows, np.nan)
+    for name in reversed(RISK_COLUMNS):  # pm25 overrides value
+        if name in table.column_names:
+            col = table[name].to_numpy(zero_copy_only=False).astype("float64")
+            ref = np.where(np.isnan(col), ref, col)
+    return np.nan_to_num(np.clip(np.round(ref / 20), 0, 5), nan=0).astype("int64")
+
+
+def read_page(pf: pq.ParquetFile, slices: list[tuple[int, int, int]]) -> Iterator[pa.Table]:
+    """Sample columns of each slice, with `risk_level` added.
+
+    `pf` is the file the slices were planned on: an open handle keeps reading that
+    version even if the file is replaced meanwhile.
+    """
+    columns = [c for c in SAMPLE_COLUMNS if c in pf.schema_arrow.names]
+    for row_group, start, stop in slices:
+        table = pf.read_row_group(row_group, columns=columns).slice(start, stop - start)
+        yield table.append_column("risk_level", pa.array(risk_level(table)))
+
+
+def _column_values(column: pa.ChunkedArray) -> list:
+    """Python values of `column` for orjson, skipping per-value Python object conversions.
+
+    UTC/naive timestamps become ISO strings (as `Timestamp.isoformat()`), dictionary columns
+    their plain values; nulls become None.
+    """
+    type_ = column.type
+    if pa.types.is_dictionary(type_):
+        return column.cast(type_.value_type).to_pylist()
+    if pa.types.is_timestamp(type_) and type_.tz in (None, "UTC", "+00:00"):
+        values = column.cast(pa.timestamp(type_.unit)).to_numpy()
+        missing = np.isnat(values)
+        per_second = np.timedelta64(1, "s") // np.timedelta64(1, type_.unit)
+        unit = "s" if (values[~missing].view("int64") % per_second == 0).all() else type_.unit
+        text = np.datetime_as_string(values, unit=unit).astype(object)
+        if type_.tz:
+            text = text + "+00:00"
+        text[missing] = None
+        return text.tolist()
+    return column.to_pylist()
+
+
+def _records(table: pa.Table) -> list[dict]:
+    names = table.column_names
+    return [dict(zip(names, row)) for row in zip(*(_column_values(table[name]) for name in names))]
+
+
+def encode_json(tables: Iterator[pa.Table], next_cursor: Optional[str]) -> Iterator[bytes]:
+    """{"rows": [...], "next_cursor": ...}, one chunk per row-group slice."""
+    yield b'{"rows":['
+    first = True
+    for table in tables:
+        records = _records(table)
+        if records:
+            yield (b"" if first else b",") + orjson.dumps(records)[1:-1]
+            first = False
+    yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+
+
+def encode_ndjson(tables: Iterator[pa.Table]) -> Iterator[bytes]:
+    for table in tables:
+        yield b"".join(orjson.dumps(record) + b"\n" for record in _records(table))
@@ -0,0 +1,97 @@
+"""Model input layout resolved once at model load.
+
+`FeatureBuilder.from_model` reads the model signature (column order, dtypes) a single
+time; the request path then only writes values into preallocated per-thread buffers and
+wraps them in a DataFrame, with no schema introspection or column-by-column mutation.
+Columns the API does not compute get their default (0 for numbers, as before, False for
+booleans, "" for strings). Models logged without a signature get the API features in
+their natural order.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+# features computed by the API from a request, in the order used without a model signature
+BASE_FEATURES = (
+    "hour",
+    "dayofweek",
+    "month",
+    "hour_sin",
+    "hour_cos",
+    "value_lag_1",
+    "value_lag_3",
+    "value_lag_24",
+)
+INT_FEATURES = ("hour", "dayofweek", "month")
+
+
+def _numpy_dtype(spec_type) -> np.dtype:
+    """numpy dtype of an MLflow ColSpec/TensorSpec type (float64 when unknown)."""
+    if isinstance(spec_type, np.dtype):
+        return spec_type
+    try:
+        return np.dtype(spec_type.to_numpy())
+    except Exception:
+        return np.dtype("float64")
+
+
+def _default(dtype: np.dtype):
+    if dtype.kind == "b":
+        return False
+    if dtype.kind in "OSU":
+        return ""
+    return dtype.type(0)
+
+
+class FeatureBuilder:
+    """Compiled model input: fixed columns, dtypes and defaults."""
+
+    def __init__(self, columns: Sequence[str], dtypes: Sequence[np.dtype]):
+        self.columns = list(columns)
+        self.dtypes = [np.dtype(d) for d in dtypes]
+        self.defaults = [_default(d) for d in self.dtypes]
+        self._slots = list(zip(self.columns, self.defaults))
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, fallback: Sequence[str] = BASE_FEATURES) -> "FeatureBuilder":
+        try:
+            inputs = model.metadata.get_input_schema().inputs
+            columns = [field.name for field in inputs]
+            dtypes = [_numpy_dtype(field.type) for field in inputs]
+        except Exception:
+            columns = list(fallback)
+            dtypes = ["int64" if c in INT_FEATURES else "float64" for c in columns]
+        return cls(columns, dtypes)
+
+    def _buffers(self) -> dict[str, np.ndarray]:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = {c: np.empty(1, dtype=d) for c, d in zip(self.columns, self.dtypes)}
+            self._local.buffers = buffers
+        return buffers
+
+    def row(self, values: Mapping[str, object]) -> pd.DataFrame:
+        """One-row model input from `values` (feature name -> value).
+
+        The frame is a view on this thread's buffers: it is only valid until the next
+        call from the same thread, i.e. for one `model.predict`.
+        """
+        buffers = self._buffers()
+        for name, default in self._slots:
+            buffers[name][0] = values.get(name, default)
+        return pd.DataFrame(buffers, copy=False)
+
+    def frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Model input for many rows: model column order and dtypes, defaults where missing."""
+        return pd.DataFrame(
+            {
+                name: df[name].to_numpy(dtype=dtype) if name in df.columns else np.full(len(df), default, dtype=dtype)
+                for name, dtype, default in zip(self.columns, self.dtypes, self.defaults)
+            },
+            copy=False,
+        )
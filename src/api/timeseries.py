@@ -0,0 +1,131 @@
+"""Filtered, chart-sized time series from the feature file (`/eda/timeseries`).
+
+Only `datetime` and `value` are read, with the city and time range pushed down to the
+parquet scan: row groups whose min/max statistics cannot match are skipped (the feature
+file is sorted by City/datetime, so a city is a few row groups). Arrow does not prune on
+dictionary-encoded columns such as City, so that check is done on the file metadata. Without a city the values of all
+cities are averaged per timestamp. The series is then reduced to `points` points with
+LTTB (Largest-Triangle-Three-Buckets), which keeps peaks and troughs where a plain
+stride or tail would drop them.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+CITY_COLUMN = "City"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Positions of the `points` samples LTTB keeps from (x, y), x ascending.
+
+    First and last samples are always kept; each bucket in between contributes the sample
+    forming the largest triangle with the previous pick and the mean of the next bucket.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n) if points >= n else np.linspace(0, n - 1, max(points, 0)).astype("int64")
+    x = x.astype("float64")
+    y = y.astype("float64")
+    edges = np.linspace(1, n - 1, points - 1).astype("int64")  # points-2 buckets over 1..n-2
+    picked = np.empty(points, dtype="int64")
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def _bound(value: Optional[str], type_: pa.DataType) -> Optional[pd.Timestamp]:
+    """`value` as a timestamp comparable with a column of `type_` (naive bounds are UTC)."""
+    if not value:
+        return None
+    ts = pd.Timestamp(value)
+    tz = getattr(type_, "tz", None)
+    if tz and ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    elif not tz and ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts
+
+
+def _row_groups(metadata: pq.FileMetaData, checks: dict) -> list[int]:
+    """Row groups whose statistics may satisfy every `checks[column](min, max)`."""
+    index = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+    keep = []
+    for rg in range(metadata.num_row_groups):
+        group = metadata.row_group(rg)
+        for column, check in checks.items():
+            stats = group.column(index[column]).statistics
+            if stats is not None and stats.has_min_max and not check(stats.min, stats.max):
+                break
+        else:
+            keep.append(rg)
+    return keep
+
+
+def read_series(path: Path, city: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """`datetime`/`value` of `city` (all cities averaged otherwise) in [start, end), time-sorted.
+
+    Raises KeyError for a missing column and ValueError for an unparsable bound.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    fragment = next(dataset.get_fragments())
+    schema = dataset.schema
+    required = ["datetime", "value"] + ([CITY_COLUMN] if city else [])
+    missing = [c for c in required if c not in schema.names]
+    if missing:
+        raise KeyError(f"Columns {missing} are required")
+    time_type = schema.field("datetime").type
+    filters, checks = [], {}
+    if city:
+        filters.append(ds.field(CITY_COLUMN) == city)
+        checks[CITY_COLUMN] = lambda lo, hi: lo <= city <= hi
+    lower, upper = _bound(start, time_type), _bound(end, time_type)
+    if lower is not None:
+        filters.append(ds.field("datetime") >= pa.scalar(lower, type=time_type))
+    if upper is not None:
+        filters.append(ds.field("datetime") < pa.scalar(upper, type=time_type))
+    if lower is not None or upper is not None:
+        checks["datetime"] = lambda lo, hi: (lower is None or hi >= lower) and (upper is None or lo < upper)
+    predicate = None
+    for f in filters:
+        predicate = f if predicate is None else predicate & f
+    if checks:
+        fragment = fragment.subset(row_group_ids=_row_groups(fragment.metadata, checks))
+    table = fragment.to_table(schema=schema, columns=["datetime", "value"], filter=predicate)
+    table = table.filter(pc.and_(pc.is_valid(table["datetime"]), pc.is_finite(table["value"])))
+    if city:
+        table = table.sort_by("datetime")
+    else:
+        table = table.group_by("datetime").aggregate([("value", "mean")]).rename_columns(["datetime", "value"]).sort_by("datetime")
+    return table.to_pandas()
+
+
+@lru_cache(maxsize=256)
+def downsampled_series(
+    path: Path,
+    signature: tuple[int, int],
+    city: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+    points: int,
+) -> tuple[list[str], list[float]]:
+    """Cached per file version (`signature`): repeated dashboard queries skip the scan."""
+    df = read_series(path, city, start, end)
+    keep = lttb(pd.DatetimeIndex(df["datetime"]).asi8, df["value"].to_numpy(dtype="float64"), points)
+    df = df.take(keep)
+    return df["datetime"].astype(str).tolist(), df["value"].astype(float).tolist()
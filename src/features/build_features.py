@@ -111,13 +111,37 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .covariates import COVARIATE_TOLERANCE, asof_join, covariate_files, load_covariates
+from .layout import write_features
+from .pipeline import (
+    CACHE_PATH,
+    StageCache,
+    fingerprint_files,
+    register_stage,
+    run_cached_stages,
+    run_stages,
+)
+from .rolling import add_rolling
 
 RAW_PATH = Path("data/raw")
+# partitioned store written by src.scraping.raw_store (parameter=<p>/date=<YYYY-MM-DD>)
+RAW_DATASET_PATH = RAW_PATH / "openaq"
 FEATURES_PATH = Path("data/features")
+# columns identifying one time series, most specific first (lags never cross series)
+SERIES_KEYS = ("sensor_id", "location_id", "locationId", "location", "City", "city")
+# how far before t - lag an observation may be and still count as the lag value
+LAG_TOLERANCE = pd.Timedelta(minutes=30)
+DEFAULT_LAGS = [1, 3, 24]
 
 
 def load_raw(file_name: str) -> pd.DataFrame:
@@ -130,14 +154,175 @@ def load_raw(file_name: str) -> pd.DataFrame:
     return pd.read_csv(path)
 
 
+def scan_raw(
+    parameter: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    columns: list[str] | None = None,
+    root: Path = RAW_DATASET_PATH,
+) -> ds.Scanner:
+    """Lazy scanner over the partitioned raw store.
+
+    `parameter` and the inclusive `start`/`end` days (YYYY-MM-DD) are matched against the
+    hive partition keys, so only the matching directories are opened. Call `.to_batches()`
+    to stream or `.to_table()` to materialize.
+    """
+    return _raw_dataset(root).scanner(columns=columns, filter=_raw_filter(parameter, start, end))
+
+
+def raw_files(
+    parameter: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    root: Path = RAW_DATASET_PATH,
+) -> list[Path]:
+    """Files of the partitioned raw store that `scan_raw` would read."""
+    fragments = _raw_dataset(root).get_fragments(filter=_raw_filter(parameter, start, end))
+    return [Path(fragment.path) for fragment in fragments]
+
+
+def _raw_dataset(root: Path) -> ds.Dataset:
+    if not root.exists():
+        raise FileNotFoundError(f"Raw dataset not found: {root}")
+    return ds.dataset(root, format="parquet", partitioning="hive")
+
+
+def _raw_filter(parameter: str | None, start: str | None, end: str | None) -> ds.Expression | None:
+    conditions = []
+    if parameter:
+        conditions.append(ds.field("parameter") == parameter)
+    if start:
+        conditions.append(ds.field("date") >= start[:10])
+    if end:
+        conditions.append(ds.field("date") <= end[:10])
+    flt = None
+    for cond in conditions:
+        flt = cond if flt is None else flt & cond
+    return flt
+
+
+def load_raw_dataset(
+    parameter: str | None = None, start: str | None = None, end: str | None = None
+) -> pd.DataFrame:
+    """Materialize the (pruned) partitioned raw store as a DataFrame."""
+    # self_destruct frees each Arrow column as soon as it has been converted
+    return scan_raw(parameter, start, end).to_table().to_pandas(self_destruct=True)
+
+
+# Known timestamp columns, most specific first: typed store layout, json_normalize'd v3/v2 payloads,
+# then generic names. Used to pick the source from the schema alone.
+DATETIME_CANDIDATES = (
+    "datetime_from",
+    "period.datetimeFrom.utc",
+    "datetime.utc",
+    "date.utc",
+    "datetime",
+    "timestamp",
+    "period.datetimeTo.utc",
+)
+_TIME_KEYWORDS = ("utc", "date", "time", "local")
+
+
+@lru_cache(maxsize=128)
+def _datetime_source(schema: tuple[tuple[str, str], ...]) -> tuple[str, str] | None:
+    """Decide, from (column, dtype) pairs only, which column holds the event time and how to read it.
+
+    Returns (column, kind) with kind "datetime" (already datetime64), "string" (parseable
+    values, possibly nested {"utc": ...} dicts), "period" (v3 period objects) or "interval"
+    (flattened period.interval lists); None when nothing in the schema looks like a timestamp.
+    Cached per schema, so repeated builds over same-shaped sources skip the decision entirely.
+    """
+    dtypes = dict(schema)
+    for col in DATETIME_CANDIDATES:
+        if col in dtypes and dtypes[col].startswith("datetime64"):
+            return col, "datetime"
+    for col in DATETIME_CANDIDATES:
+        if col in dtypes:
+            return col, "string"
+    if "period" in dtypes:
+        return "period", "period"
+    for col in ("period.interval", "period.interval.0"):
+        if col in dtypes:
+            return col, "interval"
+    for col, dtype in schema:
+        if dtype.startswith("datetime64"):
+            return col, "datetime"
+    for col, _ in schema:
+        if any(k in col.lower() for k in _TIME_KEYWORDS):
+            return col, "string"
+    return None
+
+
+def _sequence_head(values: pd.Series) -> pd.Series:
+    """values[i][0] where values[i] is a list/tuple (`[start, end]` intervals), NaN elsewhere.
+
+    v3 `interval` is a duration string ("01:00:00"), whose first character must not be
+    taken for a start.
+    """
+    return values.where(values.map(type).isin((list, tuple))).str.get(0)
+
+
+def _period_starts(period: pd.Series) -> pd.Series:
+    """Vectorized start of v3 `period` objects: interval[0], else datetimeFrom(.utc)/from/start, else p[0]."""
+    start = _sequence_head(period.str.get("interval"))
+    for key in ("datetimeFrom", "from", "start"):
+        if not start.isna().any():
+            return start
+        value = period.str.get(key)
+        start = start.fillna(value.str.get("utc"))
+        if start.isna().any():
+            # plain string values ({"from": "2026-..."}); dicts without "utc" stay missing
+            start = start.fillna(value.where(value.map(type) == str))
+    return start.fillna(period.str.get(0))
+
+
+def _to_utc(values: pd.Series) -> pd.Series:
+    """Parse ISO 8601 strings with a zone offset in Arrow (vectorized C++), else fall back to pandas."""
+    try:
+        parsed = pa.array(values, type=pa.string(), from_pandas=True).cast(pa.timestamp("us", tz="UTC"))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # naive or malformed values: pandas reads naive as UTC and turns bad values into NaT
+        return pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    return pd.Series(parsed.to_pandas(), index=values.index, name=values.name)
+
+
+def _read_datetime(df: pd.DataFrame, col: str, kind: str) -> pd.Series:
+    s = df[col]
+    if kind == "datetime":
+        return s.dt.tz_localize("UTC") if s.dt.tz is None else s.dt.tz_convert("UTC")
+    if kind == "period":
+        return _to_utc(_period_starts(s))
+    if kind == "interval":
+        return _to_utc(_sequence_head(s).fillna(s) if s.dtype == object else s)
+    first = s.first_valid_index()
+    if s.dtype == object and first is not None and isinstance(s[first], dict):
+        # nested {"utc": ..., "local": ...} dicts (unflattened v2 payloads)
+        s = s.str.get("utc")
+    return _to_utc(s)
+
+
 def pick_datetime(df: pd.DataFrame) -> pd.Series:
     """
     Return a timezone-aware UTC datetime Series.
 
-    OpenAQ v3 stores timestamps inside the 'period' object:
-      period = {'label': 'hour', 'interval': ['2026-02-06T10:00:00Z', '2026-02-06T11:00:00Z']}
-    We take interval[0] as the event time.
+    The source column is chosen from the schema (names + dtypes, see `_datetime_source`) and
+    only that column is parsed, as ISO 8601. OpenAQ v3 stores timestamps inside the 'period'
+    object:
+      period = {'datetimeFrom': {'utc': '2026-02-06T10:00:00Z'}, ...}
+      (older exports: {'label': 'hour', 'interval': ['2026-02-06T10:00:00Z', ...]})
+    and the period start is taken as the event time. If the chosen column yields no valid
+    timestamp, every candidate column is scanned as before (`_pick_datetime_scan`).
     """
+    source = _datetime_source(tuple((c, str(t)) for c, t in df.dtypes.items()))
+    if source is not None:
+        dt = _read_datetime(df, *source)
+        if dt.notna().any():
+            return dt
+    return _pick_datetime_scan(df)
+
+
+def _pick_datetime_scan(df: pd.DataFrame) -> pd.Series:
+    """Slow path: try every time-like column, then period/nested/object columns, until one parses."""
     # 1) Direct flattened columns containing time keywords
     time_like_cols = [c for c in df.columns if any(k in c.lower() for k in ["utc", "date", "time", "local"])]
     for col in time_like_cols:
@@ -198,88 +383,401 @@ def pick_datetime(df: pd.DataFrame) -> pd.Series:
     raise KeyError(f"No datetime-like column found; columns available: {list(df.columns)}")
 
 
+@register_stage("clean")
 def clean(df: pd.DataFrame) -> pd.DataFrame:
-    """Basic cleaning: datetime + value required, remove negatives."""
-    df = df.copy()
-    df["datetime"] = pick_datetime(df)
+    """Basic cleaning: datetime + value required, remove negatives, sort by time.
 
-    # keep only valid rows
-    df = df.dropna(subset=["datetime", "value"]).copy()
-    df = df[df["value"] >= 0].copy()
+    Takes ownership of `df`: the datetime column is added in place and the filtered,
+    sorted result is materialized with a single `take` (no intermediate copies).
+    """
+    df["datetime"] = pick_datetime(df)
 
-    # ensure sorting for time series steps
-    df = df.sort_values("datetime").reset_index(drop=True)
+    # keep only valid rows, in time order, in one gather
+    value = df["value"]
+    keep = np.flatnonzero((df["datetime"].notna() & value.notna() & (value >= 0)).to_numpy())
+    times = _ticks(df["datetime"])[keep]
+    order = keep if _is_sorted(times) else keep[np.argsort(times, kind="stable")]
+    if len(order) != len(df) or not _is_sorted(_ticks(df["datetime"])):
+        df = df.take(order)
+    df.index = pd.RangeIndex(len(df))
     return df
 
 
+def _ticks(times: pd.Series) -> np.ndarray:
+    """int64 view of a datetime column (NaT = min int64).
+
+    `to_numpy()` on a tz-aware column builds an object array of Timestamps instead, which
+    is two orders of magnitude slower to produce and to sort.
+    """
+    return pd.DatetimeIndex(times).asi8
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    return len(values) < 2 or bool((values[1:] >= values[:-1]).all())
+
+
+@register_stage("time_features")
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Add simple calendar + cyclic hour encoding."""
-    df = df.copy()
-    df["hour"] = df["datetime"].dt.hour
-    df["dayofweek"] = df["datetime"].dt.dayofweek
-    df["month"] = df["datetime"].dt.month
+    """Add simple calendar + cyclic hour encoding (in place)."""
+    dt = df["datetime"].dt
+    df["hour"] = dt.hour
+    df["dayofweek"] = dt.dayofweek
+    df["month"] = dt.month
 
     # cyclic encoding
-    df["hour_sin"] = np.sin(2 * np.pi * df["hour"] / 24)
-    df["hour_cos"] = np.cos(2 * np.pi * df["hour"] / 24)
+    hour_rad = (2 * np.pi / 24) * df["hour"].to_numpy()
+    df["hour_sin"] = np.sin(hour_rad)
+    df["hour_cos"] = np.cos(hour_rad)
     return df
 
 
-def add_lags(df: pd.DataFrame, lags: list[int] | None = None) -> pd.DataFrame:
-    """Add lag features on the value column."""
-    if lags is None:
-        lags = [1, 3, 24]
+def series_key(df: pd.DataFrame) -> str | None:
+    """Column identifying independent time series (sensor/location/city), if any."""
+    return next((c for c in SERIES_KEYS if c in df.columns), None)
 
-    # keep only lags that make sense for dataset length; if none, fall back to no lags
-    lags = [lag for lag in lags if lag < len(df)] or []
-    if not lags:
-        return df.reset_index(drop=True)
 
-    df = df.sort_values("datetime").copy()
-    for lag in lags:
-        df[f"value_lag_{lag}"] = df["value"].shift(lag)
+@register_stage("lags")
+def add_lags(
+    df: pd.DataFrame,
+    lags: list[int] | None = None,
+    by: str | None = None,
+    tolerance: pd.Timedelta = LAG_TOLERANCE,
+) -> pd.DataFrame:
+    """Add time-based lag features on the value column (in place).
 
-    # avoid empty outputs on tiny datasets: forward/back fill remaining NaN lag values
-    lag_cols = [f"value_lag_{lag}" for lag in lags]
-    df[lag_cols] = df[lag_cols].ffill().bfill()
-    df = df.reset_index(drop=True)
+    `value_lag_<h>` is the value of the same series (`by`, default `series_key(df)`) at
+    t - h hours: the latest observation at or before that instant, if it is no older than
+    `tolerance`; otherwise NaN (gaps are not filled). Each lag is one vectorized as-of
+    merge over the whole frame, whatever the number of series. Expects the time order set
+    by `clean`.
+    """
+    if lags is None:
+        lags = DEFAULT_LAGS
+    by = by if by is not None else series_key(df)
+    if not lags or df.empty:
+        return df
+
+    if not _is_sorted(_ticks(df["datetime"])):
+        df = df.sort_values("datetime", ignore_index=True)
+    keys = ["datetime"] + ([by] if by else [])
+    history = df[keys + ["value"]].rename(columns={"value": "_lag_value"})
+    unit = df["datetime"].dt.unit
+    for lag in lags:
+        probe = df[keys].copy()
+        # offset in the column's own unit: merge_asof requires identical key dtypes
+        probe["datetime"] = probe["datetime"] - pd.Timedelta(hours=lag).as_unit(unit)
+        matched = pd.merge_asof(
+            probe,
+            history,
+            on="datetime",
+            by=by,
+            tolerance=tolerance,
+            direction="backward",
+            allow_exact_matches=True,
+        )
+        df[f"value_lag_{lag}"] = matched["_lag_value"].to_numpy()
     return df
 
 
-def build_features(input_file: str, output_file: str = "features.parquet") -> Path:
+@register_stage("rolling")
+def add_rolling_by_series(df: pd.DataFrame, **windows) -> pd.DataFrame:
+    """`add_rolling` per `series_key(df)`; `windows` are its windows/stats/halflives."""
+    return add_rolling(df, by=series_key(df), **windows)
+
+
+@register_stage("covariates")
+def add_covariates(
+    df: pd.DataFrame,
+    path: str,
+    by: str | None = None,
+    right_by: str | None = None,
+    tolerance: str = str(COVARIATE_TOLERANCE),
+    content_hash: str | None = None,
+) -> pd.DataFrame:
+    """As-of join of the local covariates at `path` (see `src.features.covariates`).
+
+    `content_hash` is not used here: it puts the covariate files' content in the cache key.
+    """
+    return asof_join(df, load_covariates(Path(path)), by=by, right_by=right_by, tolerance=pd.Timedelta(tolerance))
+
+
+@register_stage("load", cacheable=False)
+def load_stage(
+    _, input_file: str | None = None, parameter: str | None = None, start: str | None = None, end: str | None = None
+) -> pd.DataFrame:
+    return load_raw(input_file) if input_file else load_raw_dataset(parameter, start, end)
+
+
+@register_stage("write", cacheable=False)
+def write_stage(df: pd.DataFrame, path: str) -> Path:
+    """Write in the compact feature layout (`src.features.layout`), sorted by series then time."""
+    return write_features(df, path, sort_by=feature_order(df))
+
+
+def feature_order(df: pd.DataFrame) -> list[str]:
+    key = series_key(df)
+    return [key, "datetime"] if key else ["datetime"]
+
+
+def build_features(
+    input_file: str | None = None,
+    output_file: str = "features.parquet",
+    parameter: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    rolling: bool = False,
+    lags: list[int] | None = None,
+    cache: bool = False,
+    covariates: dict | None = None,
+) -> Path:
     """
-    Build features from a raw OpenAQ file name that is located inside data/raw/.
+    Build features from a raw OpenAQ file name that is located inside data/raw/, or from
+    the partitioned raw store when no file is given (filtered by parameter/start/end).
+    Runs as one staged pipeline over a single owned frame and prints wall time and peak
+    RSS per stage. `rolling` adds the per-series rolling statistics and EWMAs of
+    `src.features.rolling` (3h/24h/7d windows).
+
+    With `cache`, stage outputs are kept in data/cache/features/ keyed by the content hash
+    of the raw files read plus each stage's parameters and code: re-running with the same
+    input only rewrites the output, and changing e.g. `lags` recomputes from the lag stage.
+
+    `covariates` as-of joins local exogenous series (e.g. hourly weather) as a last stage:
+    {"path": ..., "by": <feature key column>, "right_by": <covariate key column>,
+    "tolerance": "1h"}; see `add_covariates`.
     Usage:
+      python -m src.features.build_features --parameter pm25 --start 2026-01-01
       python -m src.features.build_features openaq_pm25_YYYYMMDDHHMMSS.parquet
     """
-    df_raw = load_raw(input_file)
-    print(f"[build] raw rows: {len(df_raw)}")
-    df = clean(df_raw)
-    print(f"[build] after clean: {len(df)}")
-    df = add_time_features(df)
-    df = add_lags(df)
-    print(f"[build] after lags/features: {len(df)}")
-
     FEATURES_PATH.mkdir(parents=True, exist_ok=True)
     out_path = FEATURES_PATH / output_file
-    df.to_parquet(out_path, index=False)
-    return out_path
+
+    plan = [
+        ("load", {"input_file": input_file, "parameter": parameter, "start": start, "end": end}),
+        ("clean", {}),
+        ("time_features", {}),
+        ("lags", {"lags": list(lags or DEFAULT_LAGS)}),
+    ]
+    if rolling:
+        plan.append(("rolling", {}))
+    if covariates:
+        covariates = dict(covariates)
+        covariates["content_hash"] = fingerprint_files(covariate_files(Path(covariates["path"])))
+        plan.append(("covariates", covariates))
+    plan.append(("write", {"path": str(out_path)}))
+
+    input_key = ""
+    if cache:
+        inputs = [RAW_PATH / input_file] if input_file else raw_files(parameter, start, end)
+        input_key = fingerprint_files(inputs, memo=CACHE_PATH / "_raw_hashes.json")
+    out, _ = run_cached_stages(plan, input_key, StageCache() if cache else None)
+    return out
+
+
+def _read_state(state_dir: Path) -> tuple[pd.DataFrame | None, pd.DataFrame | None]:
+    """(high-water marks, tail) of the previous incremental build, (None, None) before the first.
+
+    The marks frame has a `datetime` column, plus the series key column when the rows have
+    one (one mark per series); a state from before per-series marks gives its single global
+    mark.
+    """
+    meta_path = state_dir / "meta.json"
+    if not meta_path.exists():
+        return None, None
+    meta = json.loads(meta_path.read_text())
+    marks_path = state_dir / "marks.parquet"
+    if marks_path.exists():
+        marks = pd.read_parquet(marks_path)
+    else:
+        marks = pd.DataFrame({"datetime": [pd.Timestamp(meta["high_water_mark"])]})
+    tail_path = state_dir / "tail.parquet"
+    tail = pd.read_parquet(tail_path) if tail_path.exists() else None
+    return marks, tail
+
+
+def _write_state(state_dir: Path, marks: pd.DataFrame, tail: pd.DataFrame) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for name, frame in (("tail", tail), ("marks", marks)):
+        tmp = state_dir / f"{name}.parquet.tmp"
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, state_dir / f"{name}.parquet")
+    tmp = state_dir / "meta.json.tmp"
+    meta = {
+        "high_water_mark": marks["datetime"].max().isoformat(),
+        "oldest_mark": marks["datetime"].min().isoformat(),
+        "series": len(marks),
+        "tail_rows": len(tail),
+    }
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, state_dir / "meta.json")
+
+
+def _series_marks(df: pd.DataFrame, key: str | None) -> pd.DataFrame:
+    """Newest datetime of each series of `df` (one row without a series key)."""
+    if key is None:
+        return pd.DataFrame({"datetime": [df["datetime"].max()]})
+    return df.groupby(key, sort=False, dropna=False)["datetime"].max().reset_index()
+
+
+def _row_marks(df: pd.DataFrame, marks: pd.DataFrame) -> pd.Series:
+    """Mark of each row's series (NaT for a series without one)."""
+    key = next((c for c in marks.columns if c != "datetime"), None)
+    if key is None:
+        return pd.Series(marks["datetime"].iloc[0], index=df.index)
+    return df[[key]].merge(marks, on=key, how="left")["datetime"].set_axis(df.index)
+
+
+def build_features_incremental(
+    input_file: str | None = None,
+    output_name: str = "features",
+    parameter: str | None = None,
+    lags: list[int] | None = None,
+) -> Path | None:
+    """
+    Append features for raw rows newer than the previous incremental build.
+
+    The feature dataset is a directory `data/features/<output_name>/` of part files (read it
+    with `pd.read_parquet` on the directory). Its `_state/` keeps, per series, the high-water
+    mark (newest datetime already built) and the raw values of the last max(lags) hours +
+    `LAG_TOLERANCE` before it: they are prepended to the new rows so lags across the batch
+    boundary are identical to a full rebuild. A series reporting later than the others keeps
+    its own mark, so its rows are built when they arrive. Only partitions from the day of the
+    oldest mark onward are read from the store, so the cost scales with new data. Raw rows
+    older than their own series' mark are ignored. Returns the part written, or None when
+    there was nothing new.
+    """
+    lags = lags or DEFAULT_LAGS
+    out_dir = FEATURES_PATH / output_name
+    state_dir = out_dir / "_state"
+    marks, tail = _read_state(state_dir)
+    window = pd.Timedelta(hours=max(lags)) + LAG_TOLERANCE
+
+    def load(_):
+        if input_file:
+            return load_raw(input_file)
+        start = marks["datetime"].min().strftime("%Y-%m-%d") if marks is not None else None
+        return load_raw_dataset(parameter, start)
+
+    def only_new(df: pd.DataFrame) -> pd.DataFrame:
+        if marks is None:
+            return df
+        mark = _row_marks(df, marks)
+        keep = (mark.isna() | (df["datetime"] > mark)).to_numpy()
+        return df.iloc[np.flatnonzero(keep)].reset_index(drop=True)
+
+    def lags_with_tail(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        df["_tail"] = False
+        if tail is not None and not tail.empty:
+            # within a series every tail row is <= its mark < every new row; add_lags
+            # restores the global time order across series
+            df = pd.concat([tail.assign(_tail=True), df], ignore_index=True)
+        df = add_lags(df, lags)
+        return df.iloc[np.flatnonzero(~df["_tail"].to_numpy())].drop(columns="_tail").reset_index(drop=True)
+
+    def write(df: pd.DataFrame) -> Path | None:
+        if df.empty:
+            return None
+        out_dir.mkdir(parents=True, exist_ok=True)
+        part = out_dir / f"part-{pd.Timestamp.now(tz='UTC'):%Y%m%d%H%M%S%f}.parquet"
+        key = series_key(df)
+        keys = ["datetime", "value"] + ([key] if key else [])
+        recent = df[keys]
+        if tail is not None and not tail.empty:
+            recent = pd.concat([tail[keys], recent], ignore_index=True)
+        new_marks = _series_marks(recent, key)
+        # keep the last `window` of each series, counted from that series' own mark
+        recent = recent.iloc[np.flatnonzero((recent["datetime"] >= _row_marks(recent, new_marks) - window).to_numpy())]
+        if marks is not None and key in marks.columns:
+            # series absent from both the tail and this batch keep their previous mark
+            new_marks = pd.concat([marks, new_marks], ignore_index=True).groupby(key, sort=False)["datetime"].max().reset_index()
+        write_stage(df, str(part))
+        # state is advanced only once the part is on disk: a crash replays the batch
+        _write_state(state_dir, new_marks, recent.reset_index(drop=True))
+        return part
+
+    out, _ = run_stages(
+        [
+            ("load", load),
+            ("clean", clean),
+            ("only_new", only_new),
+            ("time_features", add_time_features),
+            ("lags", lags_with_tail),
+            ("write", write),
+        ]
+    )
+    return out
 
 
 def main():
     parser = argparse.ArgumentParser(description="Build feature set from raw OpenAQ data")
     parser.add_argument(
         "input_file",
-        help="File name inside data/raw (e.g., openaq_pm25_YYYYMMDDHHMMSS.parquet)",
+        nargs="?",
+        default=None,
+        help="File name inside data/raw (e.g., openaq_pm25_YYYYMMDDHHMMSS.parquet); "
+        "omit to read the partitioned store data/raw/openaq/",
     )
+    parser.add_argument("--parameter", default=None, help="Partition filter when reading the store (e.g. pm25)")
+    parser.add_argument("--start", default=None, help="First day to read from the store (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last day to read from the store (YYYY-MM-DD)")
     parser.add_argument(
         "--output",
         default="features.parquet",
         help="Output feature file name (saved to data/features/)",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only build raw rows newer than the last incremental run and append them to "
+        "data/features/<output stem>/ (ignores --start/--end)",
+    )
+    parser.add_argument(
+        "--rolling",
+        action="store_true",
+        help="Add per-series rolling mean/std/min/max (3h, 24h, 7d) and EWMA features",
+    )
+    parser.add_argument("--lags", type=int, nargs="+", default=None, help="Lag hours (default: 1 3 24)")
+    parser.add_argument(
+        "--covariates",
+        default=None,
+        help="Local covariate file or directory to as-of join (e.g. data/raw/weather, hourly Open-Meteo exports)",
+    )
+    parser.add_argument("--covariates-by", default=None, help="Feature column matching the covariate key (e.g. City)")
+    parser.add_argument("--covariates-key", default=None, help="Covariate key column (default: same as --covariates-by)")
+    parser.add_argument("--covariates-tolerance", default="1h", help="Max age of a joined covariate value")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse cached stage outputs (data/cache/features/) when input, parameters and code are unchanged",
+    )
     args = parser.parse_args()
 
-    out = build_features(args.input_file, args.output)
+    if args.incremental:
+        if args.rolling or args.cache or args.covariates:
+            parser.error("--rolling, --cache and --covariates are not supported with --incremental")
+        out = build_features_incremental(args.input_file, Path(args.output).stem, args.parameter, args.lags)
+        print(f"Features appended to {out}" if out else "No new raw data since last build")
+        return
+    covariates = None
+    if args.covariates:
+        covariates = {
+            "path": args.covariates,
+            "by": args.covariates_by,
+            "right_by": args.covariates_key,
+            "tolerance": args.covariates_tolerance,
+        }
+    out = build_features(
+        args.input_file,
+        args.output,
+        args.parameter,
+        args.start,
+        args.end,
+        args.rolling,
+        args.lags,
+        args.cache,
+        covariates,
+    )
     print(f"Features saved to {out}")
 
 
@@ -6,8 +6,25 @@ Assumptions:
 - Date column is daily; hour is set to 0
 - Lags are computed within each City (1, 3, 7 steps)
 
+Streaming mode (`--stream`) reads the CSV in chunks with fixed column dtypes and
+writes each chunk's features as Parquet row groups, so memory stays bounded by the
+chunk size whatever the file size. The last 7 values of every City are carried from
+one chunk to the next, so lags are the same as in the in-memory build; this requires
+the rows of each City to be in time order in the CSV (cities may be interleaved).
+Output rows keep the CSV order instead of being sorted by City.
+
+Files are written in the compact layout of `src.features.layout` (float32, int8 calendar
+fields, dictionary-encoded City/Country, zstd, row-group statistics); the in-memory
+build is sorted by (City, datetime) so readers can prune row groups on City.
+
+`--rolling` (in-memory build only) adds per-City rolling mean/std/min/max over 3/7/30
+days and EWMAs (see `src.features.rolling`); the windows are in days since the data is
+daily. Rows are kept when the original columns are complete: rolling std/EWMA may be
+NaN at the start of a City's history.
+
 Usage:
     python -m src.features.build_features_air_quality
+    python -m src.features.build_features_air_quality --stream [--chunk-rows 250000]
 """
 from __future__ import annotations
 
@@ -16,68 +33,218 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .layout import ROW_GROUP_SIZE, compact_frame, to_table, write_features, write_options
+from .pipeline import (
+    CACHE_PATH,
+    StageCache,
+    fingerprint_files,
+    peak_rss_mb,
+    register_stage,
+    run_cached_stages,
+)
+from .rolling import add_rolling, rolling_columns
 
 RAW_CSV = Path("data/raw/air_quality_clean.csv")
 FEATURES_PATH = Path("data/features")
+LAGS = [1, 3, 7]
+GROUP_KEY = "City"
+# weather / gases kept as potential features
+COVARIATES = ["PM10", "NO2", "SO2", "CO", "O3", "Temperature", "Humidity", "Wind Speed"]
+KEEP_COLS = [
+    "value",
+    "datetime",
+    "hour",
+    "dayofweek",
+    "month",
+    "hour_sin",
+    "hour_cos",
+    *[f"value_lag_{lag}" for lag in LAGS],
+    *COVARIATES,
+    "City",
+    "Country",
+]
+# typed CSV schema for the streaming reader: no per-chunk type inference
+CSV_DTYPES = {
+    "City": "str",
+    "Country": "str",
+    "Date": "str",
+    "PM2.5": "float64",
+    **{col: "float64" for col in COVARIATES},
+}
+# daily data: sub-day windows would always be empty
+ROLLING_WINDOWS = ("3D", "7D", "30D")
+EWM_HALFLIVES = ("3D", "7D")
 
 
-def build_features(output_file: str = "features_air_quality.parquet") -> Path:
-    df = pd.read_csv(RAW_CSV)
-    if "Date" not in df.columns or "PM2.5" not in df.columns:
-        raise ValueError("Expected columns 'Date' and 'PM2.5' in air_quality_clean.csv")
+def _to_datetime(dates: pd.Series) -> pd.Series:
+    try:
+        return pd.Series(pa.array(dates, pa.string()).cast(pa.timestamp("ns")), index=dates.index)
+    except pa.ArrowInvalid:
+        # not ISO formatted: let pandas infer the format
+        return pd.to_datetime(dates)
+
 
-    df = df.copy()
-    df["datetime"] = pd.to_datetime(df["Date"])
+@register_stage("air_quality.calendar")
+def _add_calendar(df: pd.DataFrame) -> pd.DataFrame:
+    df["datetime"] = _to_datetime(df["Date"])
     df["hour"] = 0
     df["dayofweek"] = df["datetime"].dt.dayofweek
     df["month"] = df["datetime"].dt.month
     df["hour_sin"] = np.sin(2 * np.pi * df["hour"] / 24)
     df["hour_cos"] = np.cos(2 * np.pi * df["hour"] / 24)
     df["value"] = df["PM2.5"]
+    return df
+
+
+def _add_lags(df: pd.DataFrame) -> pd.DataFrame:
+    grouped = df.groupby(GROUP_KEY, sort=False)["value"]
+    for lag in LAGS:
+        df[f"value_lag_{lag}"] = grouped.shift(lag)
+    return df
+
+
+@register_stage("air_quality.rolling")
+def _add_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    return add_rolling(df, windows=ROLLING_WINDOWS, halflives=EWM_HALFLIVES, by=GROUP_KEY)
+
+
+@register_stage("air_quality.select", cacheable=False)
+def _select(df: pd.DataFrame, rolling: bool = False) -> pd.DataFrame:
+    cols = KEEP_COLS + (rolling_columns(ROLLING_WINDOWS, halflives=EWM_HALFLIVES) if rolling else [])
+    return df[cols].dropna(subset=KEEP_COLS)
+
+
+@register_stage("air_quality.load", cacheable=False)
+def _load(_, csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    if "Date" not in df.columns or "PM2.5" not in df.columns:
+        raise ValueError("Expected columns 'Date' and 'PM2.5' in air_quality_clean.csv")
+    return df
 
+
+@register_stage("air_quality.lags")
+def _sorted_lags(df: pd.DataFrame) -> pd.DataFrame:
     # Compute lags per city
-    df = df.sort_values(["City", "datetime"]).reset_index(drop=True)
-    for lag in [1, 3, 7]:
-        df[f"value_lag_{lag}"] = df.groupby("City")["value"].shift(lag)
-
-    # Keep relevant columns + weather covariates
-    keep_cols = [
-        "value",
-        "datetime",
-        "hour",
-        "dayofweek",
-        "month",
-        "hour_sin",
-        "hour_cos",
-        "value_lag_1",
-        "value_lag_3",
-        "value_lag_7",
-        # weather / gases as potential features
-        "PM10",
-        "NO2",
-        "SO2",
-        "CO",
-        "O3",
-        "Temperature",
-        "Humidity",
-        "Wind Speed",
-        "City",
-        "Country",
-    ]
-    df = df[keep_cols]
-    df = df.dropna().reset_index(drop=True)
+    df = df.sort_values([GROUP_KEY, "datetime"]).reset_index(drop=True)
+    return _add_lags(df)
+
+
+@register_stage("air_quality.write", cacheable=False)
+def _write(df: pd.DataFrame, path: str) -> Path:
+    return write_features(df, path, sort_by=[GROUP_KEY, "datetime"])
+
+
+def build_features(
+    output_file: str = "features_air_quality.parquet",
+    csv_path: Path = RAW_CSV,
+    rolling: bool = False,
+    cache: bool = False,
+) -> Path:
+    """In-memory build; with `cache`, stage outputs are reused while the CSV content,
+    the options and the stage code are unchanged (see `src.features.pipeline`)."""
+    FEATURES_PATH.mkdir(parents=True, exist_ok=True)
+    out_path = FEATURES_PATH / output_file
+    plan = [("air_quality.load", {"csv_path": str(csv_path)}), ("air_quality.calendar", {}), ("air_quality.lags", {})]
+    if rolling:
+        plan.append(("air_quality.rolling", {}))
+    plan += [("air_quality.select", {"rolling": rolling}), ("air_quality.write", {"path": str(out_path)})]
+
+    input_key = fingerprint_files([csv_path], memo=CACHE_PATH / "_raw_hashes.json") if cache else ""
+    out, _ = run_cached_stages(plan, input_key, StageCache() if cache else None, verbose=cache)
+    return out
+
+
+class _LagState:
+    """Last `max(LAGS)` (datetime, value) rows of every City seen so far."""
+
+    def __init__(self):
+        self.tail: pd.DataFrame | None = None
+
+    def prepend(self, block: pd.DataFrame) -> pd.DataFrame:
+        block["_carried"] = False
+        if self.tail is None:
+            return block
+        last_seen = self.tail.groupby(GROUP_KEY, sort=False)["datetime"].max()
+        first_new = block.groupby(GROUP_KEY, sort=False)["datetime"].min()
+        common = first_new.index.intersection(last_seen.index)
+        if (first_new[common] < last_seen[common]).any():
+            raise ValueError(
+                f"Rows of a {GROUP_KEY} are not in time order across CSV chunks: "
+                "sort the file by City/Date or use the in-memory build"
+            )
+        return pd.concat([self.tail.assign(_carried=True), block], ignore_index=True)
+
+    def update(self, frame: pd.DataFrame) -> None:
+        self.tail = frame.groupby(GROUP_KEY, sort=False).tail(max(LAGS))[[GROUP_KEY, "datetime", "value"]]
+
+
+def build_features_streaming(
+    output_file: str = "features_air_quality.parquet",
+    csv_path: Path = RAW_CSV,
+    chunk_rows: int = 250_000,
+) -> Path:
+    """Out-of-core variant of `build_features` (see the module docstring for the ordering rule).
+
+    pandas' chunked reader is used rather than `pyarrow.csv.open_csv`, whose background
+    read-ahead buffers most of the file before the first batch is consumed.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    if "Date" not in header or "PM2.5" not in header:
+        raise ValueError("Expected columns 'Date' and 'PM2.5' in air_quality_clean.csv")
+    usecols = [col for col in CSV_DTYPES if col in header]
 
     FEATURES_PATH.mkdir(parents=True, exist_ok=True)
     out_path = FEATURES_PATH / output_file
-    df.to_parquet(out_path, index=False)
+    tmp_path = out_path.with_suffix(".tmp")
+    state = _LagState()
+    writer: pq.ParquetWriter | None = None
+    rows_in = rows_out = 0
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=usecols, dtype=CSV_DTYPES, chunksize=chunk_rows):
+            rows_in += len(chunk)
+            block = _add_calendar(chunk)
+            if not block.groupby(GROUP_KEY, sort=False)["datetime"].is_monotonic_increasing.all():
+                raise ValueError(
+                    f"Rows of a {GROUP_KEY} are not in time order in the CSV: "
+                    "sort the file by City/Date or use the in-memory build"
+                )
+            frame = _add_lags(state.prepend(block))
+            state.update(frame)
+            frame = frame.iloc[np.flatnonzero(~frame["_carried"].to_numpy())]
+            frame = _select(frame)
+            table = to_table(compact_frame(frame))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema, **write_options(table.schema))
+            writer.write_table(table.cast(writer.schema), row_group_size=ROW_GROUP_SIZE)
+            rows_out += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"{csv_path} has no rows")
+    tmp_path.replace(out_path)
+    print(f"[stream] {rows_in} rows read, {rows_out} written, peak_rss={peak_rss_mb():.1f} MiB")
     return out_path
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--output", default="features_air_quality.parquet")
+    parser.add_argument("--input", default=str(RAW_CSV), help="Source CSV")
+    parser.add_argument("--stream", action="store_true", help="Chunked build with bounded memory")
+    parser.add_argument("--chunk-rows", type=int, default=250_000, help="CSV rows per chunk in streaming mode")
+    parser.add_argument("--rolling", action="store_true", help="Add per-City rolling statistics and EWMAs")
+    parser.add_argument("--cache", action="store_true", help="Reuse cached stage outputs (data/cache/features/)")
     args = parser.parse_args()
-    out = build_features(args.output)
+    if args.stream:
+        if args.rolling or args.cache:
+            parser.error("--rolling and --cache are only available for the in-memory build")
+        out = build_features_streaming(args.output, Path(args.input), args.chunk_rows)
+    else:
+        out = build_features(args.output, Path(args.input), args.rolling, args.cache)
     print(f"Features saved to {out}")
 
 
@@ -0,0 +1,116 @@
+"""As-of join of exogenous covariates (hourly weather...) onto the measurement timeline.
+
+Covariates are read from local files: one table with a time column, a station/city key
+and one column per variable, e.g. Open-Meteo hourly exports saved under data/raw/weather/:
+
+    city, time, temperature_2m, relative_humidity_2m, wind_speed_10m
+    Paris, 2026-02-06T10:00, 4.1, 87, 12.3
+
+Each measurement gets, per key, the latest covariate row at or before its timestamp,
+if no older than `tolerance` (NaN otherwise): no value from the future leaks in. The
+join is one sort-merge (`pd.merge_asof`) over both timelines, O(n + m) after sorting,
+so years of hourly data for many stations never build a cross product.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+COVARIATES_PATH = Path("data/raw/weather")
+COVARIATE_TOLERANCE = pd.Timedelta(hours=1)
+TIME_COLUMNS = ("datetime", "time", "date", "timestamp")
+
+
+def covariate_files(path: Path = COVARIATES_PATH) -> list[Path]:
+    """Covariate files at `path` (a file, or every parquet/csv file below a directory)."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    if not path.exists():
+        raise FileNotFoundError(f"Covariates not found: {path}")
+    return sorted(p for p in path.rglob("*") if p.suffix.lower() in (".parquet", ".csv"))
+
+
+def load_covariates(path: Path = COVARIATES_PATH) -> pd.DataFrame:
+    """Read covariate files into one frame with a UTC `datetime` column.
+
+    The time column is the first of `TIME_COLUMNS` present; naive timestamps are taken as UTC.
+    """
+    frames = [pd.read_parquet(p) if p.suffix.lower() == ".parquet" else pd.read_csv(p) for p in covariate_files(path)]
+    if not frames:
+        raise FileNotFoundError(f"No parquet/csv covariate file under {path}")
+    df = pd.concat(frames, ignore_index=True)
+    time_col = next((c for c in TIME_COLUMNS if c in df.columns), None)
+    if time_col is None:
+        raise KeyError(f"No time column among {TIME_COLUMNS}; columns available: {list(df.columns)}")
+    df["datetime"] = pd.to_datetime(df.pop(time_col), utc=True, format="ISO8601")
+    return df
+
+
+def _align_times(times: pd.Series, like: pd.Series) -> pd.Series:
+    """`times` in the timezone and resolution of `like` (merge_asof needs identical key dtypes)."""
+    if like.dt.tz is None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None) if times.dt.tz is not None else times
+    else:
+        times = times.dt.tz_localize("UTC") if times.dt.tz is None else times
+        times = times.dt.tz_convert(like.dt.tz)
+    return times.dt.as_unit(like.dt.unit)
+
+
+def asof_join(
+    df: pd.DataFrame,
+    covariates: pd.DataFrame,
+    by: str | None = None,
+    right_by: str | None = None,
+    columns: Sequence[str] | None = None,
+    tolerance: pd.Timedelta = COVARIATE_TOLERANCE,
+    on: str = "datetime",
+    prefix: str = "",
+) -> pd.DataFrame:
+    """Add covariate columns to `df` by backward as-of join on `on` (in place).
+
+    `by` is the key column of `df` matched against `right_by` (default: same name) in
+    `covariates`; keys are compared as strings when their dtypes differ. Without `by`, one
+    global covariate series is joined. `columns` defaults to every covariate column except
+    the key and time; they are added as `<prefix><column>`. The row order of `df` is kept.
+    """
+    right_by = right_by or by
+    if columns is None:
+        columns = [c for c in covariates.columns if c not in (on, right_by)]
+    keys = [on] + ([by] if by else [])
+
+    renames = {c: f"{prefix}{c}" for c in columns}
+    if by:
+        renames[right_by] = by
+    right = covariates[[on] + ([right_by] if right_by else []) + list(columns)].rename(columns=renames)
+    right[on] = _align_times(right[on], df[on])
+    right = right.dropna(subset=[on]).sort_values(on, kind="stable", ignore_index=True)
+
+    left = df[keys]
+    if by and left[by].dtype != right[by].dtype:
+        left = left.assign(**{by: left[by].astype(str)})
+        right[by] = right[by].astype(str)
+    # as-of merge needs the left side in time order; results are scattered back
+    order = np.argsort(pd.DatetimeIndex(left[on]).asi8, kind="stable")
+    left = left.take(order)
+    valid = left[on].notna().to_numpy()
+    matched = pd.merge_asof(
+        left[valid],
+        right,
+        on=on,
+        by=by,
+        tolerance=tolerance,
+        direction="backward",
+        allow_exact_matches=True,
+    )
+    rows = order[valid]
+    for col in columns:
+        name = f"{prefix}{col}"
+        values = matched[name].to_numpy()
+        out = np.full(len(df), np.nan, dtype="float64" if values.dtype.kind in "biuf" else object)
+        out[rows] = values
+        df[name] = out
+    return df
@@ -0,0 +1,73 @@
+"""Compact, scan-friendly Parquet layout shared by the feature writers.
+
+- floats as float32 (measurements, lags, rolling features, cyclic encodings)
+- calendar fields (`hour`, `dayofweek`, `month`) as int8
+- low-cardinality string columns (City, Country...) dictionary-encoded, read back as
+  pandas categoricals
+- rows sorted by (series, datetime) and cut into row groups small enough for min/max
+  statistics to prune on both, with the sort order recorded in the file metadata
+
+Readers keep working unchanged (`pd.read_parquet`), and can push filters down, e.g.
+`pd.read_parquet(path, filters=[("City", "==", "Paris")], columns=["datetime", "value"])`.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CALENDAR_COLUMNS = ("hour", "dayofweek", "month")
+# string columns with at most this share of distinct values are dictionary-encoded
+DICTIONARY_MAX_RATIO = 0.5
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+ROW_GROUP_SIZE = 64 * 1024
+COMPRESSION = "zstd"
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast `df` to the feature layout dtypes (in place)."""
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col in CALENDAR_COLUMNS and pd.api.types.is_integer_dtype(dtype):
+            df[col] = df[col].astype("int8")
+        elif pd.api.types.is_float_dtype(dtype) and dtype != "float32":
+            df[col] = df[col].astype("float32")
+        elif pd.api.types.is_string_dtype(dtype) or dtype == object:
+            values = df[col]
+            if len(values) and values.nunique() <= DICTIONARY_MAX_RATIO * len(values):
+                df[col] = values.astype("category")
+    return df
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow table of an already compacted frame, with a stable schema across chunks."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = [
+        pa.field(f.name, DICTIONARY_TYPE) if pa.types.is_dictionary(f.type) else f for f in table.schema
+    ]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def write_options(schema: pa.Schema, sort_by: Sequence[str] = ()) -> dict:
+    """Keyword arguments for `pq.write_table` / `pq.ParquetWriter`."""
+    options = dict(
+        compression=COMPRESSION,
+        write_statistics=True,
+        use_dictionary=[f.name for f in schema if pa.types.is_dictionary(f.type)] or False,
+    )
+    if sort_by:
+        options["sorting_columns"] = pq.SortingColumn.from_ordering(schema, [(c, "ascending") for c in sort_by])
+    return options
+
+
+def write_features(df: pd.DataFrame, path: Path | str, sort_by: Sequence[str] = ()) -> Path:
+    """Write `df` (taken over: compacted in place) sorted by `sort_by` in the feature layout."""
+    sort_by = [c for c in sort_by if c in df.columns]
+    if sort_by:
+        df = df.sort_values(sort_by, kind="stable", ignore_index=True)
+    table = to_table(compact_frame(df))
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE, **write_options(table.schema, sort_by))
+    return Path(path)
@@ -0,0 +1,212 @@
+"""Parallel feature builds: the per-series work is sharded across a process pool.
+
+Lags (and any other history feature) only look at rows of the same series, so a shard
+holding complete series computes exactly what the serial build computes for them.
+
+- OpenAQ (`build_features`): the raw data is loaded and `clean`ed once, rows are split
+  into shards of whole series (`series_key`: sensor, location or city), and each worker
+  runs `add_time_features` + `add_lags` on its shard. Shards are re-assembled by their
+  position in the cleaned frame, i.e. in the serial row order.
+- air_quality_clean.csv (`build_features_air_quality`): shards are contiguous ranges of
+  the sorted cities, so concatenating the shard outputs in order reproduces the serial
+  sort by City/datetime.
+
+Shards are balanced on row counts and results are collected in submission order: the
+output file is byte-for-byte the same whatever the number of workers. `workers=1` runs
+in-process, without a pool.
+
+Usage:
+    python -m src.features.parallel openaq --parameter pm25 --workers 8
+    python -m src.features.parallel air-quality --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from . import build_features as bf
+from . import build_features_air_quality as aq
+from .pipeline import run_stages
+
+# shards per worker: more shards than workers evens out skewed series sizes
+SHARDS_PER_WORKER = 4
+
+
+def shard_positions(keys: pd.Series, n_shards: int) -> List[np.ndarray]:
+    """Split row positions into at most `n_shards` groups of whole series.
+
+    Series are taken in sorted key order and cut into contiguous ranges of roughly equal
+    row counts; rows keep their original relative order inside a shard. Rows with a null
+    key are dropped (no series).
+    """
+    codes, uniques = pd.factorize(keys, sort=True)
+    valid = np.flatnonzero(codes >= 0)
+    if not len(valid):
+        return []
+    # rows grouped by series (stable: original order within a series)
+    order = valid[np.argsort(codes[valid], kind="stable")]
+    sizes = np.bincount(codes[valid], minlength=len(uniques))
+    bounds = np.cumsum(sizes)
+    n_shards = max(1, min(n_shards, len(uniques)))
+    # first series index of each shard, so that every shard gets ~len(valid)/n_shards rows
+    targets = np.arange(1, n_shards) * (len(valid) / n_shards)
+    cuts = np.unique(np.searchsorted(bounds, targets, side="left") + 1)
+    cuts = cuts[(cuts > 0) & (cuts < len(uniques))]
+    row_cuts = np.concatenate([[0], bounds[cuts - 1], [len(valid)]])
+    # positions ascending: a shard keeps the input's row (and time) order
+    return [np.sort(order[a:b]) for a, b in zip(row_cuts[:-1], row_cuts[1:]) if b > a]
+
+
+def _map(fn: Callable, shards: List[pd.DataFrame], workers: int) -> Iterator:
+    if workers <= 1 or len(shards) <= 1:
+        return map(fn, shards)
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(shards)))
+
+    def results():
+        with pool:
+            yield from pool.map(fn, shards)
+
+    return results()
+
+
+def _openaq_shard(df: pd.DataFrame, rolling: bool = False) -> pd.DataFrame:
+    df = bf.add_lags(bf.add_time_features(df))
+    return bf.add_rolling_by_series(df) if rolling else df
+
+
+def _air_quality_shard(df: pd.DataFrame, rolling: bool = False) -> pd.DataFrame:
+    df = aq._add_calendar(df)
+    df = df.sort_values([aq.GROUP_KEY, "datetime"]).reset_index(drop=True)
+    df = aq._add_lags(df)
+    if rolling:
+        df = aq._add_rolling(df)
+    return aq._select(df, rolling)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def build_features_parallel(
+    input_file: str | None = None,
+    output_file: str = "features.parquet",
+    parameter: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    workers: int | None = None,
+    rolling: bool = False,
+) -> Path:
+    """Parallel `build_features`: same arguments and same output file."""
+    workers = workers or default_workers()
+    bf.FEATURES_PATH.mkdir(parents=True, exist_ok=True)
+    out_path = bf.FEATURES_PATH / output_file
+
+    def load(_):
+        return bf.load_raw(input_file) if input_file else bf.load_raw_dataset(parameter, start, end)
+
+    shard_fn = partial(_openaq_shard, rolling=rolling)
+
+    def features(df: pd.DataFrame) -> pd.DataFrame:
+        key = bf.series_key(df)
+        if key is None or workers <= 1:
+            return shard_fn(df)
+        shards = shard_positions(df[key], workers * SHARDS_PER_WORKER)
+        position = np.concatenate(shards)
+        # rows without a series key have no lags to compute: they form one more shard
+        rest = np.setdiff1d(np.arange(len(df)), position, assume_unique=True)
+        if len(rest):
+            shards.append(rest)
+            position = np.concatenate([position, rest])
+        parts = list(_map(shard_fn, [df.take(s).reset_index(drop=True) for s in shards], workers))
+        out = pd.concat(parts, ignore_index=True)
+        # back to the cleaned (serial) row order
+        return out.take(np.argsort(position, kind="stable")).reset_index(drop=True)
+
+    def write(df: pd.DataFrame) -> Path:
+        return bf.write_stage(df, str(out_path))
+
+    out, _ = run_stages(
+        [
+            ("load", load),
+            ("clean", bf.clean),
+            (f"features[{workers}]", features),
+            ("write", write),
+        ]
+    )
+    return out
+
+
+def build_features_air_quality_parallel(
+    output_file: str = "features_air_quality.parquet",
+    csv_path: Path = aq.RAW_CSV,
+    workers: int | None = None,
+    rolling: bool = False,
+) -> Path:
+    """Parallel `build_features_air_quality.build_features`: same output file."""
+    workers = workers or default_workers()
+    aq.FEATURES_PATH.mkdir(parents=True, exist_ok=True)
+    out_path = aq.FEATURES_PATH / output_file
+
+    def load(_):
+        df = pd.read_csv(csv_path)
+        if "Date" not in df.columns or "PM2.5" not in df.columns:
+            raise ValueError("Expected columns 'Date' and 'PM2.5' in air_quality_clean.csv")
+        return df
+
+    shard_fn = partial(_air_quality_shard, rolling=rolling)
+
+    def features(df: pd.DataFrame) -> pd.DataFrame:
+        # contiguous ranges of sorted cities: shard outputs concatenate in serial order
+        shards = shard_positions(df[aq.GROUP_KEY], workers * SHARDS_PER_WORKER)
+        if not shards:
+            return shard_fn(df)
+        parts = list(_map(shard_fn, [df.take(s) for s in shards], workers))
+        return pd.concat(parts, ignore_index=True)
+
+    def write(df: pd.DataFrame) -> Path:
+        return aq._write(df, str(out_path))
+
+    out, _ = run_stages(
+        [
+            ("load", load),
+            (f"features[{workers}]", features),
+            ("write", write),
+        ]
+    )
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature builds sharded across a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--rolling", action="store_true", help="Add rolling statistics and EWMAs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    openaq = sub.add_parser("openaq", help="Parallel src.features.build_features")
+    openaq.add_argument("input_file", nargs="?", default=None)
+    openaq.add_argument("--parameter", default=None)
+    openaq.add_argument("--start", default=None)
+    openaq.add_argument("--end", default=None)
+    openaq.add_argument("--output", default="features.parquet")
+    air = sub.add_parser("air-quality", help="Parallel src.features.build_features_air_quality")
+    air.add_argument("--input", default=str(aq.RAW_CSV))
+    air.add_argument("--output", default="features_air_quality.parquet")
+    args = parser.parse_args()
+
+    if args.command == "openaq":
+        out = build_features_parallel(
+            args.input_file, args.output, args.parameter, args.start, args.end, args.workers, args.rolling
+        )
+    else:
+        out = build_features_air_quality_parallel(args.output, Path(args.input), args.workers, args.rolling)
+    print(f"Features saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
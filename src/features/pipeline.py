@@ -0,0 +1,235 @@
+"""Staged execution of the feature builders with per-stage timing and memory reporting.
+
+A pipeline is an ordered list of (name, function) stages. Each function receives the
+frame produced by the previous stage and owns it: stages mutate and return it instead
+of copying, so at most one full working frame is alive at a time.
+
+Stages can also be registered by name (`register_stage`) and run from a declarative plan
+of (name, params) with `run_cached_stages`: each DataFrame output is then cached on disk
+under a key chaining the input data hash, every upstream stage's parameters and code
+version, so a re-run only recomputes the stages downstream of what changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import pandas as pd
+
+Stage = Tuple[str, Callable[[Any], Any]]
+CACHE_PATH = Path("data/cache/features")
+
+
+@dataclass
+class StageReport:
+    name: str
+    seconds: float
+    rows: int | None
+    peak_rss_mb: float
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of the process resident set size, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_stages(stages: Iterable[Stage], data: Any = None, verbose: bool = True) -> tuple[Any, list[StageReport]]:
+    """Run `stages` in order, threading the result through; returns (result, reports).
+
+    `peak_rss_mb` is the process peak *after* each stage, so the stage where it jumps is
+    the one that sets the worker's memory requirement.
+    """
+    reports: list[StageReport] = []
+    for name, fn in stages:
+        t0 = time.perf_counter()
+        data = fn(data)
+        report = StageReport(
+            name=name,
+            seconds=time.perf_counter() - t0,
+            rows=len(data) if hasattr(data, "__len__") else None,
+            peak_rss_mb=peak_rss_mb(),
+        )
+        reports.append(report)
+        if verbose:
+            rows = f"rows={report.rows}" if report.rows is not None else ""
+            print(f"[build] {name:<14} {report.seconds:8.3f}s  peak_rss={report.peak_rss_mb:8.1f} MiB  {rows}")
+    return data, reports
+
+
+def _local_modules(module_name: str) -> List[str]:
+    """`module_name` and the modules of its package it uses, transitively (sorted).
+
+    A stage depends on more than its own body: helpers and constants of its module
+    (`_ticks`, `LAG_TOLERANCE`, ...) and of sibling modules it imports from (`add_rolling`,
+    `ROLLING_WINDOWS`, ...).
+    """
+    seen, todo = set(), [module_name]
+    while todo:
+        name = todo.pop()
+        module = sys.modules.get(name)
+        if name in seen or module is None:
+            continue
+        seen.add(name)
+        # a stage module run with `python -m` is `__main__`; its package is in its spec
+        package = getattr(module.__spec__, "name", name).rpartition(".")[0]
+        for value in vars(module).values():
+            dep = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+            if isinstance(dep, str) and package and dep.startswith(package + "."):
+                todo.append(dep)
+    return sorted(seen)
+
+
+@lru_cache(maxsize=None)
+def _module_digest(module_name: str) -> bytes:
+    digest = hashlib.sha256()
+    for name in _local_modules(module_name):
+        try:
+            digest.update(inspect.getsource(sys.modules[name]).encode())
+        except (OSError, TypeError):
+            digest.update(name.encode())
+    return digest.digest()
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    name: str
+    fn: Callable[..., Any]
+    # bump when a stage's output changes for a reason its package's source does not show
+    version: int = 1
+    cacheable: bool = True
+
+    @property
+    def code_version(self) -> str:
+        """Explicit `version` + hash of the source of the stage's module and the local
+        modules it uses, so editing a helper or a constant invalidates the cache too."""
+        try:
+            source = _module_digest(self.fn.__module__)
+        except KeyError:
+            source = self.fn.__code__.co_code
+        return f"{self.version}:{hashlib.sha256(source).hexdigest()[:16]}"
+
+
+STAGE_REGISTRY: Dict[str, StageSpec] = {}
+
+
+def register_stage(name: str, version: int = 1, cacheable: bool = True):
+    """Register `fn(data, **params)` as the stage `name` (decorator; returns `fn` unchanged)."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        STAGE_REGISTRY[name] = StageSpec(name, fn, version, cacheable)
+        return fn
+
+    return decorator
+
+
+def stage_key(parent: str, spec: StageSpec, params: Dict[str, Any]) -> str:
+    payload = json.dumps([parent, spec.name, spec.code_version, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def fingerprint_files(paths: Iterable[Path], memo: Path | None = None) -> str:
+    """Content hash of `paths` (names + bytes).
+
+    With `memo`, digests are remembered per (path, size, mtime) so unchanged files, e.g.
+    the immutable parts of the raw store, are not re-read on every run.
+    """
+    known: Dict[str, list] = json.loads(memo.read_text()) if memo is not None and memo.exists() else {}
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        stat = path.stat()
+        entry = known.get(str(path))
+        if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            with open(path, "rb") as f:
+                entry = [stat.st_size, stat.st_mtime_ns, hashlib.file_digest(f, "blake2b").hexdigest()]
+            known[str(path)] = entry
+        digest.update(f"{path.name}:{entry[2]}\n".encode())
+    if memo is not None:
+        memo.parent.mkdir(parents=True, exist_ok=True)
+        tmp = memo.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_text(json.dumps(known))
+        os.replace(tmp, memo)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Parquet files `<root>/<stage>-<key>.parquet`; keeps the `keep` newest per stage."""
+
+    def __init__(self, root: Path = CACHE_PATH, keep: int = 4):
+        self.root = root
+        self.keep = keep
+
+    def path(self, name: str, key: str) -> Path:
+        return self.root / f"{name}-{key[:24]}.parquet"
+
+    def has(self, name: str, key: str) -> bool:
+        return self.path(name, key).exists()
+
+    def get(self, name: str, key: str) -> pd.DataFrame:
+        path = self.path(name, key)
+        os.utime(path)  # recently used entries survive eviction
+        return pd.read_parquet(path)
+
+    def put(self, name: str, key: str, df: pd.DataFrame) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{name}-{uuid.uuid4().hex[:8]}.tmp"
+        df.to_parquet(tmp)
+        os.replace(tmp, self.path(name, key))
+        entries = sorted(self.root.glob(f"{name}-*.parquet"), key=lambda p: p.stat().st_mtime_ns)
+        for old in entries[: -self.keep]:
+            old.unlink(missing_ok=True)
+
+
+def run_cached_stages(
+    plan: Sequence[Tuple[str, Dict[str, Any]]],
+    input_key: str,
+    cache: StageCache | None = None,
+    data: Any = None,
+    verbose: bool = True,
+) -> tuple[Any, List[StageReport]]:
+    """Run registered stages from a plan of (name, params), resuming from the cache.
+
+    Keys are computed for the whole plan upfront (`input_key` identifies the input data);
+    the run starts from the last stage whose output is cached and computes only the rest,
+    storing each cacheable DataFrame output. Without `cache` this is plain `run_stages`.
+    """
+    specs = [STAGE_REGISTRY[name] for name, _ in plan]
+    keys, key = [], input_key
+    for spec, (_, params) in zip(specs, plan):
+        key = stage_key(key, spec, params)
+        keys.append(key)
+
+    resume = 0
+    if cache is not None:
+        for i in range(len(plan) - 1, -1, -1):
+            if specs[i].cacheable and cache.has(specs[i].name, keys[i]):
+                resume = i + 1
+                break
+
+    def compute(spec: StageSpec, params: Dict[str, Any], key: str) -> Callable[[Any], Any]:
+        def run(value: Any) -> Any:
+            out = spec.fn(value, **params)
+            if cache is not None and spec.cacheable and isinstance(out, pd.DataFrame):
+                cache.put(spec.name, key, out)
+            return out
+
+        return run
+
+    stages: List[Stage] = []
+    if resume:
+        hit = specs[resume - 1]
+        stages.append((f"{hit.name} (cached)", lambda _: cache.get(hit.name, keys[resume - 1])))
+    for spec, (_, params), key in zip(specs[resume:], plan[resume:], keys[resume:]):
+        stages.append((spec.name, compute(spec, params, key)))
+    return run_stages(stages, data, verbose)
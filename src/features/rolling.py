@@ -0,0 +1,107 @@
+"""Per-series rolling-window statistics and EWMAs over time windows.
+
+All series are processed in one pass: rows are ordered by (series, time) and each
+series is moved onto its own stretch of a single synthetic time axis, separated from
+the next one by more than the largest window. One time-based `rolling`/`ewm` over that
+axis (pandas' O(n) window kernels) then equals a per-group computation, without the
+per-group overhead of `groupby().rolling()`.
+
+Features only look at the past: rolling windows are [t - w, t) and EWMAs are the value
+of the series' EWMA at its previous observation, so the current value never leaks into
+its own features.
+"""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOWS = ("3h", "24h", "7D")
+ROLLING_STATS = ("mean", "std", "min", "max")
+EWM_HALFLIVES = ("6h", "24h")
+# an EWMA weight decays below the smallest float64 after ~1075 half-lives
+_EWM_ISOLATION = 1100
+
+
+def _label(window: str) -> str:
+    return window.lower()
+
+
+def rolling_columns(
+    windows: Sequence[str] = ROLLING_WINDOWS,
+    stats: Sequence[str] = ROLLING_STATS,
+    halflives: Sequence[str] = EWM_HALFLIVES,
+    value: str = "value",
+) -> list[str]:
+    """Names of the columns `add_rolling` adds for these settings."""
+    cols = [f"{value}_roll_{stat}_{_label(w)}" for w in windows for stat in stats]
+    return cols + [f"{value}_ewm_{_label(h)}" for h in halflives]
+
+
+def _series_axis(times: pd.Series, codes: np.ndarray, isolation: pd.Timedelta) -> pd.DatetimeIndex:
+    """Synthetic, monotonic time axis on which consecutive series are `isolation` apart."""
+    for unit in (times.dt.unit, "s"):
+        ticks = pd.DatetimeIndex(times).as_unit(unit).asi8
+        ticks = ticks - ticks.min()
+        gap = int(ticks.max()) + int(isolation / pd.Timedelta(1, unit=unit)) + 1
+        if gap * (int(codes.max()) + 1) < 2**62:
+            return pd.DatetimeIndex((codes.astype("int64") * gap + ticks).astype(f"datetime64[{unit}]"))
+    raise ValueError("Too many series over too long a time span for a single rolling axis")
+
+
+def add_rolling(
+    df: pd.DataFrame,
+    windows: Sequence[str] = ROLLING_WINDOWS,
+    stats: Sequence[str] = ROLLING_STATS,
+    halflives: Sequence[str] = EWM_HALFLIVES,
+    by: str | None = None,
+    on: str = "datetime",
+    value: str = "value",
+) -> pd.DataFrame:
+    """Add past-only rolling statistics and EWMAs of `value` per series `by` (in place).
+
+    `<value>_roll_<stat>_<window>` is the stat (mean/std/min/max/sum/count...) of the
+    series' values in [t - window, t); `<value>_ewm_<halflife>` is the time-decayed EWMA
+    (pandas `ewm(halflife=, times=)`) as of the series' previous observation. Windows and
+    half-lives are pandas offsets ("3h", "7D"). Rows of a null `by` get NaN. Any row order
+    is accepted; the frame's order is kept.
+    """
+    if df.empty or (not windows and not halflives):
+        return df
+    if by is None:
+        codes = np.zeros(len(df), dtype="int64")
+    else:
+        codes = pd.factorize(df[by])[0]
+    valid = np.flatnonzero(codes >= 0)
+    if not len(valid):
+        for name in rolling_columns(windows, stats, halflives, value):
+            df[name] = np.nan
+        return df
+    ticks = pd.DatetimeIndex(df[on]).asi8
+    order = valid[np.lexsort((ticks[valid], codes[valid]))]
+    codes = codes[order]
+
+    largest = max(
+        [pd.Timedelta(w) for w in windows] + [pd.Timedelta(h) * _EWM_ISOLATION for h in halflives]
+    )
+    axis = _series_axis(df[on].take(order), codes, largest)
+    series = pd.Series(df[value].to_numpy(dtype="float64")[order], index=axis)
+    # first row of each series: its EWMA has no previous observation
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+
+    def scatter(name: str, values: np.ndarray) -> None:
+        out = np.full(len(df), np.nan)
+        out[order] = values
+        df[name] = out
+
+    for window in windows:
+        roll = series.rolling(window, closed="left", min_periods=1)
+        for stat in stats:
+            scatter(f"{value}_roll_{stat}_{_label(window)}", getattr(roll, stat)().to_numpy())
+    for halflife in halflives:
+        ewm = series.ewm(halflife=pd.Timedelta(halflife), times=axis).mean().to_numpy()
+        previous = np.r_[np.nan, ewm[:-1]]
+        previous[starts] = np.nan
+        scatter(f"{value}_ewm_{_label(halflife)}", previous)
+    return df
@@ -2,32 +2,109 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, Any, List
+import math
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, List, Iterable, Tuple
 
-import httpx
+from .session import ScrapingSession, session_scope, sync_session_scope
 
 AIRNOW_BASE_URL = "https://www.airnowapi.org/aq/observation/latLong/current/"
 DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONCURRENCY = 8
+# decimal places of the coordinates sent to the API
+QUERY_PRECISION = 4
 
 
-def fetch_current(lat: float, lon: float, distance: int = 25) -> List[Dict[str, Any]]:
+def _params(lat: float, lon: float, distance: float) -> Dict[str, Any]:
     api_key = os.getenv("AIRNOW_API_KEY")
     if not api_key:
         raise RuntimeError("AIRNOW_API_KEY not set in environment")
-
-    params = {
+    return {
         "format": "application/json",
-        "latitude": lat,
-        "longitude": lon,
-        "distance": distance,
+        "latitude": round(lat, QUERY_PRECISION),
+        "longitude": round(lon, QUERY_PRECISION),
+        "distance": math.ceil(distance),
         "API_KEY": api_key,
     }
-    with httpx.Client() as client:
-        resp = client.get(AIRNOW_BASE_URL, params=params, timeout=DEFAULT_TIMEOUT)
+
+
+def fetch_current(
+    lat: float, lon: float, distance: int = 25, session: ScrapingSession | None = None
+) -> List[Dict[str, Any]]:
+    """Current observations around a point; pass a shared `session` to reuse its connection pool."""
+    params = _params(lat, lon, distance)
+    with sync_session_scope(session) as active:
+        resp = active.sync_client.get(AIRNOW_BASE_URL, params=params, timeout=DEFAULT_TIMEOUT)
         resp.raise_for_status()
         return resp.json()
 
 
+@dataclass(frozen=True)
+class QueryCircle:
+    lat: float
+    lon: float
+    distance: float
+
+
+def plan_queries(points: Iterable[Tuple[float, float]], distance: float = 25) -> List[QueryCircle]:
+    """One query per distinct point, at the precision sent to the API (`QUERY_PRECISION`).
+
+    `observation/latLong/current` answers with the reporting area nearest to the query
+    point, not every site within `distance`, so queries cannot be merged into larger
+    circles without losing areas; only points that round to the same query are collapsed.
+    """
+    return [
+        QueryCircle(lat, lon, distance)
+        for lat, lon in sorted({(round(lat, QUERY_PRECISION), round(lon, QUERY_PRECISION)) for lat, lon in points})
+    ]
+
+
+def _site_key(obs: Dict[str, Any]) -> tuple:
+    return (
+        obs.get("ReportingArea"),
+        obs.get("StateCode"),
+        obs.get("Latitude"),
+        obs.get("Longitude"),
+        obs.get("ParameterName"),
+    )
+
+
+async def fetch_many(
+    points: Iterable[Tuple[float, float]],
+    distance: float = 25,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    session: ScrapingSession | None = None,
+) -> List[Dict[str, Any]]:
+    """Current observations around many points in one concurrent batch.
+
+    Duplicate points are queried once (see `plan_queries`), the queries run concurrently
+    over the session's pooled async client, and observations are reduced to one per site
+    and parameter (neighbouring points often share their nearest reporting area), so the
+    result holds the same sites as one `fetch_current` call per point.
+    """
+    circles = plan_queries(points, distance)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with session_scope(session) as active:
+
+        async def query(c: QueryCircle) -> List[Dict[str, Any]]:
+            async with semaphore:
+                resp = await active.async_client.get(
+                    AIRNOW_BASE_URL, params=_params(c.lat, c.lon, c.distance), timeout=DEFAULT_TIMEOUT
+                )
+                resp.raise_for_status()
+                return resp.json()
+
+        pages = await asyncio.gather(*(query(c) for c in circles))
+
+    seen: Dict[tuple, Dict[str, Any]] = {}
+    for page in pages:
+        for obs in page:
+            seen.setdefault(_site_key(obs), obs)
+    return list(seen.values())
+
+
 if __name__ == "__main__":
     # Example: coordinates for Los Angeles
     print(fetch_current(34.0522, -118.2437)[:2])
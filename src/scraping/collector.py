@@ -0,0 +1,247 @@
+"""Resident collector: polls OpenAQ (and optionally AirNow) on fixed intervals.
+
+Replaces launching `python -m src.scraping.save_openaq_latest` from cron: imports and
+the pooled `ScrapingSession` are set up once and reused by every cycle.
+
+- Each source runs in its own loop; a cycle never overlaps the previous one of the same
+  source (a slow cycle delays the next tick, missed ticks are counted, not queued).
+- A lock file prevents two collectors from writing the same store.
+- SIGINT/SIGTERM stop scheduling new cycles and let running ones finish (up to a grace
+  period) before the session is closed.
+- `data/state/collector_status.json` is rewritten after every cycle with per-source
+  health: last success/error, rows written, lag since the last success and, for OpenAQ,
+  the newest stored measurement.
+
+Usage:
+    python -m src.scraping.collector --country FR --openaq-interval 900
+    python -m src.scraping.collector --airnow-point 34.05,-118.24 --airnow-interval 3600
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import signal
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from .airnow_client import fetch_many
+from .save_openaq_latest import collect_latest
+from .session import ScrapingSession
+from .state import STATE_PATH, load_high_water_marks, state_file
+
+load_dotenv()
+
+STATUS_FILE = STATE_PATH / "collector_status.json"
+LOCK_FILE = STATE_PATH / "collector.lock"
+AIRNOW_RAW_PATH = Path("data/raw/airnow")
+SHUTDOWN_GRACE = 30.0
+
+
+@dataclass
+class SourceStatus:
+    interval: float
+    running: bool = False
+    cycles: int = 0
+    skipped_ticks: int = 0
+    rows: int | None = None
+    last_start: str | None = None
+    last_success: str | None = None
+    last_error: str | None = None
+    last_duration: float | None = None
+    newest_measurement: str | None = None
+    _last_success_ts: float | None = field(default=None, repr=False)
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+        data["lag_seconds"] = (
+            round(time.time() - self._last_success_ts, 1) if self._last_success_ts is not None else None
+        )
+        return data
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def save_airnow_observations(observations: List[Dict[str, Any]], root: Path = AIRNOW_RAW_PATH) -> int:
+    """Append raw AirNow observations under `date=<DateObserved>/`; returns rows written."""
+    by_day: Dict[str, List[Dict[str, Any]]] = {}
+    for obs in observations:
+        by_day.setdefault(str(obs.get("DateObserved", "unknown")).strip(), []).append(obs)
+    for day, rows in by_day.items():
+        part_dir = root / f"date={day}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pylist(rows), part_dir / f"part-{uuid.uuid4().hex[:12]}.parquet")
+    return len(observations)
+
+
+class Collector:
+    def __init__(self, session: ScrapingSession, status_file: Path = STATUS_FILE):
+        self.session = session
+        self.status_file = status_file
+        self.sources: Dict[str, SourceStatus] = {}
+        self._jobs: Dict[str, Callable[[], Awaitable[int]]] = {}
+        self._stop = asyncio.Event()
+
+    def add_source(self, name: str, interval: float, job: Callable[[], Awaitable[int]]) -> None:
+        """Register `job` (returns rows written) to run every `interval` seconds."""
+        self.sources[name] = SourceStatus(interval=interval)
+        self._jobs[name] = job
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def write_status(self) -> None:
+        self.status_file.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "pid": os.getpid(),
+            "updated": _now(),
+            "sources": {name: status.to_json() for name, status in self.sources.items()},
+        }
+        tmp = self.status_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, indent=2))
+        os.replace(tmp, self.status_file)
+
+    async def _cycle(self, name: str) -> None:
+        status = self.sources[name]
+        status.running, status.last_start = True, _now()
+        self.write_status()
+        t0 = time.perf_counter()
+        try:
+            status.rows = await self._jobs[name]()
+            status.last_success, status._last_success_ts = _now(), time.time()
+            status.last_error = None
+        except Exception as exc:  # keep the daemon alive; the error is surfaced in the status file
+            logging.exception("[collector] %s cycle failed", name)
+            status.last_error = f"{type(exc).__name__}: {exc}"
+        finally:
+            status.running = False
+            status.cycles += 1
+            status.last_duration = round(time.perf_counter() - t0, 3)
+            self.write_status()
+
+    async def _run_source(self, name: str) -> None:
+        interval = self.sources[name].interval
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            await self._cycle(name)
+            next_tick += interval
+            now = time.monotonic()
+            if now > next_tick:
+                # the cycle overran: drop the missed ticks instead of running back-to-back
+                missed = int((now - next_tick) // interval) + 1
+                self.sources[name].skipped_ticks += missed
+                next_tick += missed * interval
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=next_tick - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+        tasks = [asyncio.create_task(self._run_source(name), name=name) for name in self.sources]
+        await self._stop.wait()
+        logging.info("[collector] stopping, waiting up to %.0fs for running cycles", SHUTDOWN_GRACE)
+        _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_GRACE)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self.write_status()
+
+
+def _acquire_lock(path: Path = LOCK_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # "a+" does not truncate: the PID of the collector holding the lock stays readable
+    handle = open(path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise RuntimeError(f"Another collector holds {path}")
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def _openaq_job(collector: Collector, args: argparse.Namespace) -> Callable[[], Awaitable[int]]:
+    async def job() -> int:
+        rows = 0
+        for parameter in args.parameters:
+            rows += await collect_latest(
+                city=args.city,
+                country=args.country,
+                parameter=parameter,
+                limit=args.limit,
+                session=collector.session,
+            )
+            if marks := load_high_water_marks(state_file(parameter)):
+                collector.sources["openaq"].newest_measurement = max(marks.values())
+        return rows
+
+    return job
+
+
+def _airnow_job(collector: Collector, args: argparse.Namespace) -> Callable[[], Awaitable[int]]:
+    async def job() -> int:
+        observations = await fetch_many(args.airnow_points, args.airnow_distance, session=collector.session)
+        return await asyncio.to_thread(save_airnow_observations, observations) if observations else 0
+
+    return job
+
+
+def _point(text: str) -> tuple[float, float]:
+    lat, lon = (float(v) for v in text.split(","))
+    return lat, lon
+
+
+async def _main(args: argparse.Namespace) -> None:
+    async with ScrapingSession() as session:
+        collector = Collector(session)
+        if args.openaq_interval > 0:
+            collector.add_source("openaq", args.openaq_interval, _openaq_job(collector, args))
+        if args.airnow_points and args.airnow_interval > 0:
+            collector.add_source("airnow", args.airnow_interval, _airnow_job(collector, args))
+        if not collector.sources:
+            raise SystemExit("Nothing to collect: enable OpenAQ and/or pass --airnow-point")
+        await collector.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuously collect air quality data")
+    parser.add_argument("--city", default=os.getenv("DEFAULT_CITY"))
+    parser.add_argument("--country", default=os.getenv("DEFAULT_COUNTRY", "FR"))
+    parser.add_argument("--parameters", nargs="+", default=["pm25"], help="OpenAQ parameters (e.g. pm25 no2)")
+    parser.add_argument("--limit", type=int, default=1000, help="Max OpenAQ rows per parameter and cycle")
+    parser.add_argument("--openaq-interval", type=float, default=900, help="Seconds between OpenAQ cycles (0=off)")
+    parser.add_argument("--airnow-point", dest="airnow_points", type=_point, action="append", default=[])
+    parser.add_argument("--airnow-distance", type=int, default=25)
+    parser.add_argument("--airnow-interval", type=float, default=3600, help="Seconds between AirNow cycles")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    lock = _acquire_lock()
+    try:
+        asyncio.run(_main(args))
+    finally:
+        lock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,17 +8,26 @@ Notes
 from __future__ import annotations
 
 import os
+import time
+import random
 import asyncio
 import logging
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime
+from typing import Dict, Any, List, AsyncIterator, Mapping
 
 import httpx
 from dotenv import load_dotenv
 
+from .session import ScrapingSession, session_scope
+
 load_dotenv()
 
 OPENAQ_BASE_URL = os.getenv("OPENAQ_BASE_URL", "https://api.openaq.org/v3")
 DEFAULT_TIMEOUT = 10.0
+# max number of sensor requests in flight at once during a fan-out
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("OPENAQ_MAX_CONCURRENCY", "8"))
 
 PARAMETER_IDS = {
     "pm25": 2,
@@ -30,7 +39,9 @@ PARAMETER_IDS = {
 }
 
 
+@lru_cache(maxsize=1)
 def _headers() -> Dict[str, str]:
+    """Request headers, computed once per process (call `_headers.cache_clear()` after changing the key)."""
     headers = {"Accept": "application/json"}
     api_key = os.getenv("OPENAQ_API_KEY")
     if api_key:
@@ -40,20 +51,143 @@ def _headers() -> Dict[str, str]:
     return headers
 
 
-async def _fetch(client: httpx.AsyncClient, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    resp = await client.get(
-        f"{OPENAQ_BASE_URL}/{endpoint}", params=params, timeout=DEFAULT_TIMEOUT, headers=_headers()
-    )
-    if resp.status_code == 401:
-        # Provide a more actionable error message
-        masked = os.getenv("OPENAQ_API_KEY", "")
-        masked = masked[:4] + "..." + masked[-4:] if masked else "<absent>"
-        raise RuntimeError(
-            "Unauthorized (401) from OpenAQ. Check that your OPENAQ_API_KEY is valid and active. "
-            f"Key loaded: {masked}. Response: {resp.text}"
+@dataclass
+class FetchStats:
+    """Counters for the requests issued through a `RequestScheduler`."""
+
+    requests: int = 0
+    retries: int = 0
+    throttled_seconds: float = 0.0
+
+
+class RequestScheduler:
+    """Token bucket pacing OpenAQ requests to the API key quota, with retry/backoff policy.
+
+    The bucket refills at `rate_per_minute` and holds at most `burst` tokens. Each request
+    reserves a token (the balance may go negative) and sleeps until its reservation is
+    covered, so concurrent callers are queued fairly without a lock. The `x-ratelimit-*`
+    response headers are authoritative: the local balance is capped by the server's
+    `remaining`, and the bucket is frozen until `reset` when the quota is exhausted.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = 60.0,
+        burst: int | None = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be > 0")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 6)))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = FetchStats()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        return cls(
+            rate_per_minute=float(os.getenv("OPENAQ_RATE_PER_MINUTE", "60")),
+            max_retries=int(os.getenv("OPENAQ_MAX_RETRIES", "5")),
         )
-    resp.raise_for_status()
-    return resp.json()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait for a request slot."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        wait = max(self._blocked_until - now, -self._tokens / self.rate, 0.0)
+        self.stats.requests += 1
+        if wait > 0:
+            self.stats.throttled_seconds += wait
+            await asyncio.sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold every request for `seconds` (quota exhausted or 429)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def observe(self, resp: httpx.Response) -> None:
+        """Sync the bucket with the rate-limit headers of a response."""
+        remaining = _header_float(resp, "x-ratelimit-remaining")
+        reset = _header_float(resp, "x-ratelimit-reset")
+        if remaining is not None:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, remaining)
+            if remaining <= 0 and reset:
+                self.block_for(reset)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential delay for retry number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        return max(delay, retry_after or 0.0)
+
+    def reset_stats(self) -> FetchStats:
+        """Start a new run; returns the counters of the previous one."""
+        stats, self.stats = self.stats, FetchStats()
+        return stats
+
+
+def _header_float(resp: httpx.Response, name: str) -> float | None:
+    try:
+        return float(resp.headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+# Shared by every request of the process: the quota belongs to the API key, not to a call.
+SCHEDULER = RequestScheduler.from_env()
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def _fetch(client: httpx.AsyncClient, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        await SCHEDULER.acquire()
+        last_attempt = attempt >= SCHEDULER.max_retries
+        try:
+            resp = await client.get(
+                f"{OPENAQ_BASE_URL}/{endpoint}", params=params, timeout=DEFAULT_TIMEOUT, headers=_headers()
+            )
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+            SCHEDULER.stats.retries += 1
+            await asyncio.sleep(SCHEDULER.backoff(attempt))
+            attempt += 1
+            continue
+
+        SCHEDULER.observe(resp)
+        if resp.status_code == 401:
+            # Provide a more actionable error message
+            masked = os.getenv("OPENAQ_API_KEY", "")
+            masked = masked[:4] + "..." + masked[-4:] if masked else "<absent>"
+            raise RuntimeError(
+                "Unauthorized (401) from OpenAQ. Check that your OPENAQ_API_KEY is valid and active. "
+                f"Key loaded: {masked}. Response: {resp.text}"
+            )
+        if resp.status_code in RETRY_STATUSES and not last_attempt:
+            delay = SCHEDULER.backoff(attempt, _header_float(resp, "retry-after"))
+            SCHEDULER.stats.retries += 1
+            if resp.status_code == 429:
+                # hold back every caller, not just this one, until the window reopens
+                SCHEDULER.block_for(delay)
+            else:
+                await asyncio.sleep(delay)
+            logging.info("OpenAQ %s on %s, retry %d in %.1fs", resp.status_code, endpoint, attempt + 1, delay)
+            attempt += 1
+            continue
+        resp.raise_for_status()
+        return resp.json()
 
 
 ASYNC_PARAMS_BASE = {
@@ -61,6 +195,42 @@ ASYNC_PARAMS_BASE = {
     "page": 1,
     "sort": "desc",
 }
+# largest page size accepted by the v3 list endpoints
+PAGE_SIZE = 1000
+
+
+async def _iter_pages(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    params: Dict[str, Any],
+    limit: int | None = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield successive `results` pages of a v3 list endpoint, up to `limit` rows.
+
+    The request for page n+1 is issued before page n is handed to the caller, so network
+    time overlaps with the caller's processing. Only one page is buffered at any time.
+    Iteration stops on the first short page (or once `limit` rows have been yielded).
+    """
+    page_size = params.get("limit", PAGE_SIZE)
+    page = params.get("page", 1)
+    remaining = limit
+    next_page = asyncio.ensure_future(_fetch(client, endpoint, {**params, "page": page}))
+    try:
+        while next_page is not None:
+            results = (await next_page).get("results", [])
+            next_page = None
+            if len(results) >= page_size and (remaining is None or remaining > len(results)):
+                page += 1
+                next_page = asyncio.ensure_future(_fetch(client, endpoint, {**params, "page": page}))
+            if remaining is not None:
+                results = results[:remaining]
+                remaining -= len(results)
+            if results:
+                yield results
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+            await asyncio.gather(next_page, return_exceptions=True)
 
 
 def _parameter_id(parameter: str) -> int:
@@ -76,8 +246,81 @@ async def _find_locations(client: httpx.AsyncClient, city: str | None, country:
         params["city"] = city
     if country:
         params["country"] = country
-    payload = await _fetch(client, "locations", params)
-    return payload.get("results", [])
+    return [loc async for page in _iter_pages(client, "locations", params) for loc in page]
+
+
+async def _location_sensors(client: httpx.AsyncClient, loc: Dict[str, Any], parameter_id: int) -> List[int]:
+    """Return the ids of the sensors of a location measuring `parameter_id`, in API order."""
+    sensors = loc.get("sensors", [])
+    # If sensors not embedded, fallback to locations/{id}/sensors
+    if not sensors and (loc_id := loc.get("id")):
+        payload = await _fetch(client, f"locations/{loc_id}/sensors", {"limit": 50})
+        sensors = payload.get("results", [])
+    return [
+        sensor["id"]
+        for sensor in sensors
+        if sensor.get("parameter", {}).get("id") == parameter_id and sensor.get("id") is not None
+    ]
+
+
+async def iter_measurements(
+    sensor_id: int,
+    limit: int | None = None,
+    page_size: int = PAGE_SIZE,
+    params: Dict[str, Any] | None = None,
+    session: ScrapingSession | None = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Stream the measurements of a sensor page by page (v3 `sensors/{id}/measurements`).
+
+    Yields lists of raw result dicts as they arrive, prefetching the next page meanwhile,
+    so arbitrarily long histories can be consumed in constant memory:
+
+        async for page in iter_measurements(sensor_id, params={"datetime_from": "2025-01-01"}):
+            ...
+
+    `limit` caps the total number of rows (None = everything the API returns); `params`
+    adds extra query filters. A temporary session is opened for the duration of the
+    iteration unless a shared one is passed in.
+    """
+    query = {**ASYNC_PARAMS_BASE, **(params or {}), "limit": page_size}
+    async with session_scope(session) as active:
+        async for page in _iter_pages(active.async_client, f"sensors/{sensor_id}/measurements", query, limit):
+            yield page
+
+
+async def _collect(pages: AsyncIterator[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    return [row async for page in pages for row in page]
+
+
+def measurement_start(row: Dict[str, Any]) -> datetime | None:
+    """UTC start of a v3 measurement period (`period.datetimeFrom.utc`), if present."""
+    utc = ((row.get("period") or {}).get("datetimeFrom") or {}).get("utc")
+    return datetime.fromisoformat(utc) if utc else None
+
+
+async def _sensor_rows(
+    sensor_id: int,
+    limit: int,
+    page_size: int,
+    since: str | None,
+    session: ScrapingSession,
+) -> List[Dict[str, Any]]:
+    """Measurements of one sensor tagged with `sensor_id`, strictly newer than `since` when given.
+
+    With `since` the sensor is paged oldest first from the mark, so when more than `limit`
+    rows are new the ones returned are the oldest of them: storing them and moving the mark
+    to the newest one leaves no gap, and the rest is picked up by the next run.
+    """
+    params = {"datetime_from": since, "sort": "asc"} if since else None
+    rows = await _collect(iter_measurements(sensor_id, limit, page_size, params=params, session=session))
+    if since:
+        # datetime_from is inclusive: drop the row(s) already stored at the high-water mark
+        cutoff = datetime.fromisoformat(since)
+        rows = [row for row in rows if (start := measurement_start(row)) is not None and start > cutoff]
+        rows.sort(key=measurement_start)
+    for row in rows:
+        row["sensor_id"] = sensor_id
+    return rows
 
 
 async def fetch_latest(
@@ -85,63 +328,99 @@ async def fetch_latest(
     country: str | None = None,
     parameter: str = "pm25",
     limit: int = 200,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    session: ScrapingSession | None = None,
+    since: Mapping[int, str] | None = None,
 ) -> List[Dict[str, Any]]:
     """Fetch latest measurements by first locating sensors then pulling their measurements.
 
     OpenAQ v3 no longer supports a global `/measurements` list; data must be fetched per sensor.
-    Strategy: find sensors matching city/country/parameter, then fetch measurements for the first one
-    (or several until limit is reached).
+    Strategy: find sensors matching city/country/parameter, then page through their measurements
+    concurrently (at most `max_concurrency` sensors in flight). Rows are returned in
+    location/sensor order, exactly as a sequential pull would, and truncated to `limit`;
+    outstanding requests are cancelled as soon as the ordered prefix reaches `limit`.
+    Pass a shared `session` to reuse pooled connections across calls.
+
+    Every row carries the `sensor_id` it was read from. `since` maps sensor ids to an ISO
+    UTC timestamp (a high-water mark): for those sensors only measurements starting strictly
+    after it are requested (v3 `datetime_from`) and returned oldest first, and an empty
+    result is not an error. When `limit` cuts a sensor's new rows, the oldest ones are kept,
+    so advancing the high-water mark over the returned rows never skips a measurement; a
+    backlog larger than `limit` is caught up over several runs.
     """
-    async with httpx.AsyncClient() as client:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be >= 1")
+    parameter_id = _parameter_id(parameter)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(fn, *args):
+        # build the coroutine only once a slot is free, so cancelled tasks leave nothing un-awaited
+        async with semaphore:
+            return await fn(*args)
+
+    async with session_scope(session) as active:
+        client = active.async_client
         locations = await _find_locations(client, city, country, parameter)
         if not locations:
             raise RuntimeError(f"No locations found for parameter={parameter}, city={city}, country={country}")
 
-        results: List[Dict[str, Any]] = []
-        remaining = limit
-
-        for loc in locations:
-            if remaining <= 0:
-                break
-            sensors = loc.get("sensors", [])
-            # If sensors not embedded, fallback to locations/{id}/sensors
-            if not sensors and (loc_id := loc.get("id")):
-                payload = await _fetch(client, f"locations/{loc_id}/sensors", {"limit": 50})
-                sensors = payload.get("results", [])
-
-            for sensor in sensors:
-                if remaining <= 0:
-                    break
-                if sensor.get("parameter", {}).get("id") != _parameter_id(parameter):
-                    continue
-                sensor_id = sensor.get("id")
-                if sensor_id is None:
-                    continue
-                per_sensor_limit = min(remaining, 200)
-                payload = await _fetch(
-                    client,
-                    f"sensors/{sensor_id}/measurements",
-                    {**ASYNC_PARAMS_BASE, "limit": per_sensor_limit},
+        per_location = await asyncio.gather(
+            *(bounded(_location_sensors, client, loc, parameter_id) for loc in locations)
+        )
+        sensor_ids = [sensor_id for ids in per_location for sensor_id in ids]
+
+        page_size = min(limit, PAGE_SIZE)
+        tasks = [
+            asyncio.ensure_future(
+                bounded(
+                    _sensor_rows, sensor_id, limit, page_size, (since or {}).get(sensor_id), active
                 )
-                sensor_results = payload.get("results", [])
-                results.extend(sensor_results)
-                remaining -= len(sensor_results)
-        if not results:
+            )
+            for sensor_id in sensor_ids
+        ]
+        index_of = {task: i for i, task in enumerate(tasks)}
+        done: Dict[int, List[Dict[str, Any]]] = {}
+        prefix_len, prefix_rows = 0, 0
+        try:
+            pending = set(tasks)
+            while pending and prefix_rows < limit:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    done[index_of[task]] = task.result()
+                # advance over the contiguous block of finished sensors
+                while prefix_len in done and prefix_rows < limit:
+                    prefix_rows += len(done[prefix_len])
+                    prefix_len += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = [row for i in range(prefix_len) for row in done[i]][:limit]
+        if not results and since is None:
             raise RuntimeError("No measurements returned; try another city/country/parameter or check API key limits.")
         return results
 
 
-async def fetch_sensor_measurements(sensor_id: int, limit: int = 500) -> List[Dict[str, Any]]:
+async def fetch_sensor_measurements(
+    sensor_id: int, limit: int = 500, session: ScrapingSession | None = None
+) -> List[Dict[str, Any]]:
     """Fetch raw measurements for a specific sensor id (v3 `sensors/{id}/measurements`)."""
-
-    params = {"limit": limit}
-    async with httpx.AsyncClient() as client:
-        payload = await _fetch(client, f"sensors/{sensor_id}/measurements", params)
-    return payload.get("results", [])
+    return await _collect(
+        iter_measurements(sensor_id, limit=limit, page_size=min(limit, PAGE_SIZE), session=session)
+    )
 
 
-def fetch_sync(city: str | None = None, country: str | None = None, parameter: str = "pm25", limit: int = 200) -> List[Dict[str, Any]]:
-    return asyncio.run(fetch_latest(city=city, country=country, parameter=parameter, limit=limit))
+def fetch_sync(
+    city: str | None = None,
+    country: str | None = None,
+    parameter: str = "pm25",
+    limit: int = 200,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    return asyncio.run(
+        fetch_latest(city=city, country=country, parameter=parameter, limit=limit, max_concurrency=max_concurrency)
+    )
 
 
 if __name__ == "__main__":
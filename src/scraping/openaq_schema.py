@@ -0,0 +1,79 @@
+"""Fixed-schema decoding of OpenAQ v3 measurement results into Arrow columns.
+
+Replaces `pandas.json_normalize` for raw storage: every run produces the same typed
+columns whatever fields the API happens to return, in one pass over the dicts and
+without building an intermediate object DataFrame.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable
+
+import pandas as pd
+import pyarrow as pa
+
+UTC_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+MEASUREMENT_SCHEMA = pa.schema(
+    [
+        ("sensor_id", pa.int64()),
+        ("parameter_id", pa.int16()),
+        ("datetime_from", UTC_TIMESTAMP),
+        ("datetime_to", UTC_TIMESTAMP),
+        ("value", pa.float32()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+    ]
+)
+
+
+def _timestamps(values: list[str | None]) -> pa.Array:
+    strings = pa.array(values, pa.string())
+    try:
+        return strings.cast(UTC_TIMESTAMP)
+    except pa.ArrowInvalid:
+        # at least one malformed value: parse leniently, unparseable -> null
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors="coerce", format="ISO8601")
+        return pa.array(parsed, UTC_TIMESTAMP)
+
+
+def decode_measurements(results: Iterable[Dict[str, Any]]) -> pa.RecordBatch:
+    """Decode v3 `sensors/{id}/measurements` results into a `MEASUREMENT_SCHEMA` batch.
+
+    Reads `sensor_id` (added by `fetch_latest`), `parameter.id`, `period.datetimeFrom.utc`,
+    `period.datetimeTo.utc`, `value` and `coordinates.latitude/longitude`; anything else is
+    ignored and missing fields become nulls. Records without a period start are skipped.
+    """
+    sensor_id: list = []
+    parameter_id: list = []
+    dt_from: list = []
+    dt_to: list = []
+    value: list = []
+    lat: list = []
+    lon: list = []
+    empty: Dict[str, Any] = {}
+    for row in results:
+        period = row.get("period") or empty
+        start = (period.get("datetimeFrom") or empty).get("utc")
+        if start is None:
+            continue
+        coords = row.get("coordinates") or empty
+        sensor_id.append(row.get("sensor_id"))
+        parameter_id.append((row.get("parameter") or empty).get("id"))
+        dt_from.append(start)
+        dt_to.append((period.get("datetimeTo") or empty).get("utc"))
+        value.append(row.get("value"))
+        lat.append(coords.get("latitude"))
+        lon.append(coords.get("longitude"))
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(sensor_id, pa.int64()),
+            pa.array(parameter_id, pa.int16()),
+            _timestamps(dt_from),
+            _timestamps(dt_to),
+            pa.array(value, pa.float32()),
+            pa.array(lat, pa.float64()),
+            pa.array(lon, pa.float64()),
+        ],
+        schema=MEASUREMENT_SCHEMA,
+    )
@@ -0,0 +1,126 @@
+"""Append-only, hive-partitioned Parquet store for raw OpenAQ measurements.
+
+Layout:
+    data/raw/openaq/parameter=pm25/date=2026-02-06/part-<run>-<n>.parquet
+
+Each collection run appends new files to the partitions it touches; nothing is
+rewritten. `compact` later merges the small per-run files of a partition into one
+file with full row groups. Readers scan the directory as a single dataset and prune
+partitions on `parameter`/`date` (see `src.features.build_features.scan_raw`).
+
+Usage:
+    python -m src.scraping.raw_store compact [--parameter pm25]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import uuid
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Iterable
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RAW_DATASET_PATH = Path("data/raw/openaq")
+PARTITIONING = ds.partitioning(pa.schema([("parameter", pa.string()), ("date", pa.string())]), flavor="hive")
+# rows per Parquet row group: large enough for efficient scans, small enough for selective reads
+ROW_GROUP_SIZE = 128 * 1024
+# UTC period start of a decoded measurement (see src.scraping.openaq_schema)
+TIME_COLUMN = "datetime_from"
+
+
+def _with_partition_columns(batch: pa.RecordBatch, parameter: str) -> pa.RecordBatch:
+    day = pc.strftime(batch.column(TIME_COLUMN), "%Y-%m-%d")
+    batch = batch.append_column("parameter", pa.array([parameter] * batch.num_rows, pa.string()))
+    return batch.append_column("date", day)
+
+
+def write_batches(
+    batches: Iterable[pa.RecordBatch],
+    parameter: str,
+    root: Path = RAW_DATASET_PATH,
+) -> list[Path]:
+    """Stream record batches into the partitioned store; returns the files written.
+
+    All batches must share one schema (normally `MEASUREMENT_SCHEMA`). Rows are routed to `parameter=<parameter>/date=<day>`
+    from their period start, and each call writes fresh uniquely named files, so concurrent
+    or repeated runs never overwrite each other.
+    """
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None:
+        return []
+    first = _with_partition_columns(first, parameter)
+
+    def _all():
+        yield first
+        for batch in batches:
+            yield _with_partition_columns(batch, parameter)
+
+    written: list[Path] = []
+    run = f"{datetime.now(UTC):%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    ds.write_dataset(
+        _all(),
+        root,
+        schema=first.schema,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{run}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=min(ROW_GROUP_SIZE, 16 * 1024),
+        file_visitor=lambda f: written.append(Path(f.path)),
+    )
+    return written
+
+
+def write_table(table: pa.Table, parameter: str, root: Path = RAW_DATASET_PATH) -> list[Path]:
+    return write_batches(table.to_batches(max_chunksize=ROW_GROUP_SIZE), parameter, root)
+
+
+def _partition_dirs(root: Path, parameter: str | None) -> list[Path]:
+    pattern = f"parameter={parameter}/date=*" if parameter else "parameter=*/date=*"
+    return sorted(p for p in root.glob(pattern) if p.is_dir())
+
+
+def compact(root: Path = RAW_DATASET_PATH, parameter: str | None = None) -> int:
+    """Merge the files of every partition holding more than one into a single file.
+
+    Rows are sorted by time and written with full row groups. The merged file is renamed
+    into place before the inputs are removed, so a reader never sees a partition without
+    its data (at worst, briefly, both). Returns the number of partitions compacted.
+    """
+    compacted = 0
+    for part_dir in _partition_dirs(root, parameter):
+        files = sorted(part_dir.glob("*.parquet"))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(f) for f in files]).sort_by(TIME_COLUMN)
+        tmp = part_dir / f".compact-{uuid.uuid4().hex[:8]}.tmp"
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp, part_dir / f"part-compacted-{uuid.uuid4().hex[:8]}.parquet")
+        for f in files:
+            f.unlink()
+        compacted += 1
+    return compacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance of the partitioned raw OpenAQ store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_cmd = sub.add_parser("compact", help="Merge small per-run files inside each partition")
+    compact_cmd.add_argument("--parameter", default=None, help="Only compact this parameter (e.g. pm25)")
+    compact_cmd.add_argument("--root", default=str(RAW_DATASET_PATH))
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        n = compact(Path(args.root), args.parameter)
+        print(f"Compacted {n} partition(s) in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
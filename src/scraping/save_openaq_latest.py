@@ -2,14 +2,15 @@ from __future__ import annotations
 
 import asyncio
 from pathlib import Path
-from datetime import datetime, UTC
 import os
 
-import pandas as pd
-from pandas import json_normalize
 from dotenv import load_dotenv
 
-from .openaq_client import fetch_latest
+from .openaq_client import SCHEDULER, fetch_latest
+from .session import ScrapingSession
+from .openaq_schema import decode_measurements
+from .raw_store import RAW_DATASET_PATH, write_batches
+from .state import advance_high_water_marks, load_high_water_marks, save_high_water_marks, state_file
 
 RAW_PATH = Path("data/raw")
 
@@ -17,29 +18,63 @@ RAW_PATH = Path("data/raw")
 load_dotenv()
 
 
-def save_latest(
+async def collect_latest(
     city: str | None = None,
     country: str | None = None,
     parameter: str = "pm25",
     limit: int = 200,
-) -> Path:
-    """Download latest measurements and persist to parquet."""
+    incremental: bool = True,
+    session: ScrapingSession | None = None,
+) -> int:
+    """Download latest measurements and append them to the partitioned raw store.
+
+    In incremental mode (default) each sensor is only asked for measurements newer than its
+    high-water mark from the previous run (see `src.scraping.state`); only those new rows are
+    written. The marks are saved after the parquet file so an interrupted run is simply
+    retried. Decoding and writing run in a worker thread. Returns the number of rows written.
+    """
     if not os.getenv("OPENAQ_API_KEY"):
         raise RuntimeError("OPENAQ_API_KEY not set; create one at https://platform.openaq.org/ and add to .env")
 
     RAW_PATH.mkdir(parents=True, exist_ok=True)
-    results = asyncio.run(fetch_latest(city=city, country=country, parameter=parameter, limit=limit))
+    marks_path = state_file(parameter)
+    marks = load_high_water_marks(marks_path) if incremental else {}
+    results = await fetch_latest(
+        city=city, country=country, parameter=parameter, limit=limit, session=session, since=marks or None
+    )
     if not results:
+        if marks:
+            return 0
         raise RuntimeError("No data fetched from OpenAQ (check filters or API key)")
 
-    # flatten nested datetime/parameter/coordinates into columns
-    df = json_normalize(results)
-    ts = datetime.now(UTC).strftime("%Y%m%d%H%M%S")
-    out_path = RAW_PATH / f"openaq_{parameter}_{ts}.parquet"
-    df.to_parquet(out_path, index=False)
-    return out_path
+    def store() -> int:
+        # decode nested period/parameter/coordinates into fixed typed columns
+        batch = decode_measurements(results)
+        write_batches([batch], parameter)
+        if incremental:
+            save_high_water_marks(advance_high_water_marks(marks, results), marks_path)
+        return batch.num_rows
+
+    # parquet encoding and file writes block; keep them off the event loop shared with other sources
+    return await asyncio.to_thread(store)
+
+
+def save_latest(
+    city: str | None = None,
+    country: str | None = None,
+    parameter: str = "pm25",
+    limit: int = 200,
+    incremental: bool = True,
+) -> Path | None:
+    """Blocking one-shot version of `collect_latest`; returns the partition written to, if any."""
+    rows = asyncio.run(
+        collect_latest(city=city, country=country, parameter=parameter, limit=limit, incremental=incremental)
+    )
+    return RAW_DATASET_PATH / f"parameter={parameter}" if rows else None
 
 
 if __name__ == "__main__":
     path = save_latest(city=os.getenv("DEFAULT_CITY"), country=os.getenv("DEFAULT_COUNTRY", "FR"))
-    print(f"Saved to {path}")
+    stats = SCHEDULER.stats
+    print(f"Saved to {path}" if path else "No new measurements since last run")
+    print(f"[openaq] requests={stats.requests} retries={stats.retries} throttled={stats.throttled_seconds:.1f}s")
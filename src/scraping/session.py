@@ -0,0 +1,104 @@
+"""Shared, pooled HTTP session for the scraping clients.
+
+One `ScrapingSession` keeps a keep-alive connection pool open across calls, so a
+collector loop pays the TCP/TLS handshake once per host instead of once per request.
+The async client (OpenAQ) and the sync client (AirNow) are created lazily on first use.
+
+Usage:
+    async with ScrapingSession(max_connections=20) as session:
+        rows = await fetch_latest(country="FR", session=session)
+        more = await fetch_sensor_measurements(1234, session=session)
+"""
+from __future__ import annotations
+
+import importlib.util
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+import httpx
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+class ScrapingSession:
+    """Lifecycle-managed pair of pooled httpx clients shared by the scraping package."""
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError("http2=True requires the 'h2' package: pip install 'httpx[http2]'")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self._async_client: httpx.AsyncClient | None = None
+        self._sync_client: httpx.Client | None = None
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(limits=self.limits, http2=self.http2, timeout=self.timeout)
+        return self._async_client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(limits=self.limits, http2=self.http2, timeout=self.timeout)
+        return self._sync_client
+
+    def close(self) -> None:
+        """Close the sync client (the async one needs `aclose`)."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def aclose(self) -> None:
+        """Close both clients."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    def __enter__(self) -> "ScrapingSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ScrapingSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+@asynccontextmanager
+async def session_scope(session: ScrapingSession | None) -> AsyncIterator[ScrapingSession]:
+    """Yield `session` as is, or a temporary session closed on exit when None."""
+    if session is not None:
+        yield session
+        return
+    async with ScrapingSession() as own_session:
+        yield own_session
+
+
+@contextmanager
+def sync_session_scope(session: ScrapingSession | None) -> Iterator[ScrapingSession]:
+    """Sync counterpart of `session_scope`."""
+    if session is not None:
+        yield session
+        return
+    with ScrapingSession() as own_session:
+        yield own_session
@@ -0,0 +1,48 @@
+"""Persistent collection state: last ingested measurement time per OpenAQ sensor.
+
+Stored as a small JSON file `{"<sensor_id>": "<ISO UTC timestamp>"}` under data/state/,
+rewritten atomically so an interrupted run never leaves a truncated file behind.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from .openaq_client import measurement_start
+
+STATE_PATH = Path("data/state")
+
+
+def state_file(parameter: str) -> Path:
+    return STATE_PATH / f"openaq_{parameter}_high_water_marks.json"
+
+
+def load_high_water_marks(path: Path) -> Dict[int, str]:
+    """Sensor id -> ISO timestamp of the newest measurement already stored."""
+    if not path.exists():
+        return {}
+    return {int(sensor_id): ts for sensor_id, ts in json.loads(path.read_text()).items()}
+
+
+def save_high_water_marks(marks: Dict[int, str], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({str(k): v for k, v in sorted(marks.items())}, indent=2))
+    os.replace(tmp, path)
+
+
+def advance_high_water_marks(marks: Dict[int, str], rows: Iterable[Dict[str, Any]]) -> Dict[int, str]:
+    """Return a copy of `marks` moved forward to the newest period start seen per sensor."""
+    newest: Dict[int, datetime] = {
+        sensor_id: datetime.fromisoformat(ts) for sensor_id, ts in marks.items()
+    }
+    for row in rows:
+        sensor_id, start = row.get("sensor_id"), measurement_start(row)
+        if sensor_id is None or start is None:
+            continue
+        if sensor_id not in newest or start > newest[sensor_id]:
+            newest[sensor_id] = start
+    return {sensor_id: ts.isoformat().replace("+00:00", "Z") for sensor_id, ts in newest.items()}
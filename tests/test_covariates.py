@@ -0,0 +1,78 @@
+"""As-of join of local weather covariates (`src.features.covariates`) on a small CSV fixture.
+
+The fixture stands in for hourly Open-Meteo exports under data/raw/weather/, so the join
+is checked without the live weather API.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.build_features import add_covariates
+from src.features.covariates import asof_join, load_covariates
+
+WEATHER = Path(__file__).parent / "fixtures" / "weather.csv"
+
+# (city, measurement time on 2026-02-06 UTC, expected temperature_2m)
+CASES = [
+    ("Paris", "10:30", 4.1),  # latest Paris row at or before 10:30
+    ("Lyon", "10:30", 1.5),  # same instant, other station: Lyon's own row
+    ("Paris", "11:00", 5.0),  # exact match
+    ("Paris", "13:00", 6.2),  # 12:00 row is exactly `tolerance` old: kept
+    ("Paris", "13:30", np.nan),  # 12:00 row is older than the 1h tolerance
+    ("Lyon", "13:30", np.nan),  # 11:00 too old, 14:00 is in the future
+    ("Lyon", "09:00", np.nan),  # before the first covariate row
+]
+
+
+def measurements() -> pd.DataFrame:
+    # deliberately not in time order: the join must keep the row order of the input
+    return pd.DataFrame(
+        {
+            "city": [city for city, _, _ in CASES],
+            "datetime": pd.to_datetime([f"2026-02-06T{t}" for _, t, _ in CASES], utc=True),
+            "value": np.arange(len(CASES), dtype="float64"),
+        }
+    )
+
+
+def expected() -> np.ndarray:
+    return np.array([temperature for _, _, temperature in CASES])
+
+
+def test_load_covariates_parses_time_as_utc():
+    weather = load_covariates(WEATHER)
+    assert "time" not in weather.columns
+    assert str(weather["datetime"].dt.tz) == "UTC"
+    assert weather["datetime"].min() == pd.Timestamp("2026-02-06T10:00", tz="UTC")
+    assert len(weather) == 6
+
+
+def test_asof_join_per_station_with_tolerance():
+    out = asof_join(measurements(), load_covariates(WEATHER), by="city", tolerance=pd.Timedelta(hours=1))
+    np.testing.assert_array_equal(out["temperature_2m"].to_numpy(), expected())
+    assert out["relative_humidity_2m"].iloc[1] == 90
+    np.testing.assert_array_equal(out["value"].to_numpy(), np.arange(len(CASES)))
+
+
+def test_asof_join_without_key_uses_one_global_series():
+    out = asof_join(measurements(), load_covariates(WEATHER), tolerance=pd.Timedelta(hours=2))
+    # Lyon at 13:30 gets Paris' 12:00 row: the latest of any station, Lyon's 14:00 is ahead
+    assert out["temperature_2m"].iloc[5] == 6.2
+    assert np.isnan(out["temperature_2m"].iloc[6])
+
+
+def test_asof_join_naive_measurements_and_key_dtype_mismatch():
+    df = measurements()
+    df["datetime"] = df["datetime"].dt.tz_localize(None).dt.as_unit("ms")
+    weather = load_covariates(WEATHER).rename(columns={"city": "station"})
+    weather["station"] = weather["station"].astype("category")
+    out = asof_join(df, weather, by="city", right_by="station", tolerance=pd.Timedelta(hours=1), prefix="w_")
+    np.testing.assert_array_equal(out["w_temperature_2m"].to_numpy(), expected())
+
+
+@pytest.mark.parametrize("tolerance, nan_rows", [("1h", 3), ("2h", 2), ("3h", 1)])
+def test_add_covariates_stage(tolerance, nan_rows):
+    out = add_covariates(measurements(), str(WEATHER), by="city", tolerance=tolerance)
+    assert out["temperature_2m"].isna().sum() == nan_rows